@@ -0,0 +1,399 @@
+## @file   Batch.py
+#  @brief  Generates worship charts for many setlists from a manifest without the GUI.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import csv
+import json
+import sys
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+from Build import BuildManifest
+from Document import docFromTemplate, docTemplate, pdfWrite, placeSong
+from Fragments import getFragmentCache
+from Helpers import checkFileName, checkKey, checkVariant, getOutputDir, jobCount
+from Index import getSongIndex
+from Pdf import pdfSetup, placeSong as pdfPlaceSong
+from Pipeline import readSongs, runPipeline
+from Search import getSearchIndex, suggest
+from Stats import stats
+from Stream import StreamingDocument
+from Variants import SetlistVariants, variantName
+
+
+## @brief  Exception for an incorrectly formatted manifest.
+class ManifestError(Exception):
+    pass
+
+
+## @brief          Reads a JSON manifest of the form {"Setlist": [["Song", "Key"], ...], ...}.
+#  @param[in] fp   The manifest file.
+#  @return         A list of setlist names and their lists of (song, key) pairs.
+def readJSON(fp):
+    try:
+        setlists = [(name, [(song, key) for song, key in songs]) for name, songs in json.load(fp).items()]
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ManifestError(f"Invalid JSON manifest ({e}).")
+
+    for name, setlist in setlists:
+        if not all(isinstance(song, str) and isinstance(key, str) for song, key in setlist):
+            raise ManifestError(f"Invalid JSON manifest (the songs and keys of \"{name}\" aren't all strings).")
+    return setlists
+
+
+## @brief          Reads a CSV manifest with rows of the form "Setlist,Song,Key".
+#  @param[in] fp   The manifest file.
+#  @return         A list of setlist names and their lists of (song, key) pairs.
+def readCSV(fp):
+    setlists = {}
+    for i, row in enumerate(csv.reader(fp)):
+        if not row or (i == 0 and [r.strip().lower() for r in row] == ["setlist", "song", "key"]):
+            continue
+        if len(row) != 3:
+            raise ManifestError(f"Row {i + 1} of the CSV manifest doesn't have three columns.")
+        name, song, key = (r.strip() for r in row)
+        setlists.setdefault(name, []).append((song, key))
+    return list(setlists.items())
+
+
+## @brief          Reads a text manifest of setlists separated by blank lines.
+#  @details        The first line of each setlist is its name, and every other line is a song
+#                  followed by its key (eg. "Living Hope Bb" or "Living Hope Bb capo 3").
+#  @param[in] fp   The manifest file.
+#  @return         A list of setlist names and their lists of (song, key) pairs.
+def readText(fp):
+    setlists = []
+    name = None
+    for i, line in enumerate(fp):
+        line = line.strip()
+        if not line:
+            name = None
+        elif name is None:
+            name = line
+            setlists.append((name, []))
+        else:
+            words = line.split()
+            if len(words) < 2:
+                raise ManifestError(f"Line {i + 1} of the manifest has no key.")
+            # Keys can have more than one word (eg. "D dorian capo 2"), so the longest valid key is used
+            n = next((n for n in range(min(len(words) - 1, 4), 1, -1) if checkKey(" ".join(words[-n:]))), 1)
+            setlists[-1][1].append((" ".join(words[:-n]), " ".join(words[-n:])))
+    return setlists
+
+
+## @brief          Reads a manifest of setlists, based on its file extension.
+#  @param[in] path The path of the manifest (.json, .csv or plain text).
+#  @return         A list of setlist names and their lists of (song, key) pairs.
+#  @throw          ManifestError if the manifest isn't formatted correctly.
+def readManifest(path):
+    path = Path(path)
+    reader = {".json": readJSON, ".csv": readCSV}.get(path.suffix.lower(), readText)
+    with path.open(newline="") as fp:
+        return reader(fp)
+
+
+## @brief              Checks that every song of a setlist exists and is valid in its key.
+#  @param[in] index    The song index.
+#  @param[in] name     The name of the setlist.
+#  @param[in] setlist  A list of (song, key) pairs.
+#  @return             A list of error messages.
+def checkSetlist(index, name, setlist):
+    errors = []
+    if not checkFileName(name):
+        errors.append(f"{name}: Invalid file name.")
+    for song, key in setlist:
+        if song not in index.entries:
+            errors.append(f"{name}: \"{song}\" not found in the songs directory.{suggest(song)}")
+        elif index.error(song):
+            errors.append(f"{name}: {index.error(song)}")
+        if not checkKey(key):
+            errors.append(f"{name}: \"{key}\" is not a valid key.")
+    return errors
+
+
+## @brief               Writes a variant of a setlist to a new document.
+#  @param[in] template  The document template (from docTemplate).
+#  @param[in] items     The songs of the variant (see Variants.SetlistVariants.items).
+#  @param[in] fragments The cache to copy songs from (see Fragments.FragmentCache), or None to write them.
+#  @return              The document.
+def renderSetlist(template, items, fragments=None):
+    doc = docFromTemplate(template)
+    for song, key, newPage, lines in items:
+        doc = placeSong(doc, song, key, newPage, lines, fragments)
+    return doc
+
+
+## @brief           Writes a variant of a setlist directly to a new .pdf document.
+#  @param[in] items The songs of the variant (see Variants.SetlistVariants.items).
+#  @return          The .pdf document.
+def renderPdf(items):
+    pdf = pdfSetup()
+    for song, key, newPage, lines in items:
+        pdf = pdfPlaceSong(pdf, song, key, newPage, lines)
+    return pdf
+
+
+## @brief              Writes a setlist in every variant.
+#  @details            Streamed charts (see options.stream) are saved as they are written.
+#  @param[in] template The document template (from docTemplate).
+#  @param[in] name     The name of the setlist.
+#  @param[in] setlist  A list of (song, key) pairs.
+#  @param[in] songs    A dictionary of parsed songs by name.
+#  @param[in] options  The command line arguments (see parseArgs), with the output directory and variants.
+#  @return             A list of the file name, .docx file, document (or None if it was streamed) and
+#                      songs (see Variants.SetlistVariants.items) of each variant.
+def renderCharts(template, name, setlist, songs, options):
+    variants = SetlistVariants([songs[s] for s, _ in setlist], [k for _, k in setlist], options.reorder)
+    fragments = getFragmentCache() if options.cache else None
+    charts = []
+
+    for variant in options.variants:
+        items = variants.items(variant)
+        filename = variantName(name, variant)
+        filepathDOCX = options.output / f"{filename}.docx"
+
+        if options.stream:
+            with StreamingDocument(filepathDOCX, template, fragments) as doc:
+                for song, key, newPage, lines in items:
+                    doc.placeSong(song, key, newPage, lines)
+            doc = None
+        else:
+            doc = renderSetlist(template, items, fragments)
+        charts.append((filename, filepathDOCX, doc, items))
+
+    return charts
+
+
+## @brief             Saves the charts of a setlist in the output directory (see renderCharts).
+#  @param[in] charts  The charts, from renderCharts.
+#  @param[in] options The command line arguments (see parseArgs), with the output directory.
+#  @return            An error message, or None if every chart was saved.
+def saveCharts(charts, options):
+    errors = []
+
+    for filename, filepathDOCX, doc, items in charts:
+        filepathPDF = options.output / f"{filename}.pdf"
+        try:
+            if doc is not None:
+                with stats.timer("save"):
+                    doc.save(str(filepathDOCX))
+
+            if options.pdf == "native":
+                renderPdf(items).save(filepathPDF)
+            elif options.pdf == "word" and not pdfWrite(filepathDOCX.resolve(), filepathPDF.resolve()):
+                errors.append(f"{filename}: Error saving chord sheet as PDF.")
+        except OSError as e:
+            # Eg. the file is open in Word
+            errors.append(f"{filename}: Error saving chord sheet ({e.strerror or e}).")
+
+    return "\n".join(errors) or None
+
+
+## @brief              Writes a setlist in every variant and saves them in the output directory.
+#  @param[in] template The document template (from docTemplate).
+#  @param[in] name     The name of the setlist.
+#  @param[in] setlist  A list of (song, key) pairs.
+#  @param[in] songs    A dictionary of parsed songs by name.
+#  @param[in] options  The command line arguments (see parseArgs), with the output directory and variants.
+#  @return             An error message, or None if every chart was saved.
+def saveSetlist(template, name, setlist, songs, options):
+    try:
+        charts = renderCharts(template, name, setlist, songs, options)
+    except OSError as e:
+        # Streamed charts are saved while they are rendered
+        return failure(name, e)
+    return saveCharts(charts, options)
+
+
+## @brief          Gets the error message of a setlist that couldn't be written.
+#  @param[in] name The name of the setlist.
+#  @param[in] e    The exception raised writing the setlist.
+#  @return         The error message.
+def failure(name, e):
+    return f"{name}: Error writing chord sheet ({getattr(e, 'strerror', None) or e})."
+
+
+## @brief The template, parsed songs and options of a worker process (set by initWorker).
+worker = {}
+
+
+## @brief              Sets up a worker process with the data shared by every setlist.
+#  @param[in] template The document template (from docTemplate).
+#  @param[in] songs    A dictionary of parsed songs by name.
+#  @param[in] options  The command line arguments (see saveSetlist).
+def initWorker(template, songs, options):
+    worker["template"] = template
+    worker["songs"] = songs
+    worker["options"] = options
+    # Forked processes start with a copy of the stats of the main process, which are already counted
+    stats.take()
+
+
+## @brief  Writes a setlist and saves it in a worker process (see saveSetlist).
+#  @return An error message (or None if the chart was saved), and the stats of writing it.
+def saveSetlistWorker(name, setlist):
+    try:
+        error = saveSetlist(worker["template"], name, setlist, worker["songs"], worker["options"])
+    except Exception as e:
+        error = failure(name, e)
+    return error, stats.take()
+
+
+## @brief              Writes and saves setlists, in order, in this process or in a process pool.
+#  @details            In this process, songs are read and charts are saved while other charts are
+#                      rendered (see Pipeline.pipeline). A process pool is sent every song at once.
+#  @param[in] template The document template (from docTemplate).
+#  @param[in] setlists A list of setlist names and their lists of (song, key) pairs.
+#  @param[in] options  The command line arguments (see saveSetlist).
+#  @return             A generator of the result of saveSetlist for each setlist.
+def saveSetlists(template, setlists, options):
+    if options.jobs == 1:
+        yield from runPipeline(setlists, lambda name, setlist, songs: renderCharts(template, name, setlist, songs, options),
+                               lambda charts: saveCharts(charts, options), failure)
+    else:
+        songs = readSongs(song for _, setlist in setlists for song, _ in setlist)
+        # Each worker gets the template, the parsed songs and the options once, then only setlists are sent
+        with ProcessPoolExecutor(options.jobs or None, initializer=initWorker,
+                                 initargs=(template, songs, options)) as pool:
+            for error, snapshot in pool.map(saveSetlistWorker, [name for name, _ in setlists],
+                                            [setlist for _, setlist in setlists]):
+                stats.merge(snapshot)
+                yield error
+
+
+## @brief          Gets the command line arguments for batch generation.
+#  @param[in] args The arguments to parse (defaults to the command line).
+#  @return         The parsed arguments.
+def parseArgs(args=None):
+    parser = ArgumentParser(description="Generates a worship chart for each setlist in a manifest.")
+    parser.add_argument("manifest", help="a .json, .csv or plain text file of setlists")
+    parser.add_argument("-o", "--output", type=Path, help="the output directory (defaults to Settings.txt)")
+    parser.add_argument("--pdf", nargs="?", const="native", choices=["native", "word"],
+                        help="also save each chart as a .pdf, directly (the default) or with Word")
+    parser.add_argument("-j", "--jobs", type=jobCount, default=1,
+                        help="the number of processes to render with (0 for one per CPU, the default is 1)")
+    parser.add_argument("--reorder", action="store_true", help="reorder songs to fit each chart on fewer pages")
+    parser.add_argument("--variant", action="append", default=[], dest="variants",
+                        help="also write each chart with a capo (eg. \"capo 2\") or transposed (eg. \"+2\"), "
+                             "which can be given more than once")
+    parser.add_argument("--stream", action="store_true",
+                        help="write each .docx one song at a time instead of keeping it in memory (for large setlists)")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="rebuild every chart, even if its songs, keys and settings haven't changed")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="write every song instead of copying songs already written from src/fragments/")
+    parser.add_argument("--stats", type=Path,
+                        help="save the time spent in each stage to a file (as Prometheus metrics if it ends with .prom, "
+                             "and as JSON otherwise)")
+    parser.add_argument("--profile", type=Path,
+                        help="profile the run with cProfile and save the profile to a file (only this process is "
+                             "profiled, so use with -j 1)")
+    return parser.parse_args(args)
+
+
+## @brief          Generates the chart for every setlist in a manifest.
+#  @param[in] args The parsed command line arguments (see parseArgs).
+#  @return         The exit code: 0 if every setlist was generated and 1 otherwise.
+def generate(args):
+    start = perf_counter()
+
+    # Every chart is written as given, then in each variant
+    args.variants = [""] + [v for v in args.variants if v]
+    for variant in args.variants:
+        if not checkVariant(variant):
+            print(f"\"{variant}\" is not a valid variant.")
+            return 1
+
+    try:
+        setlists = readManifest(args.manifest)
+    except (OSError, ManifestError) as e:
+        print(e)
+        return 1
+
+    args.output = args.output or getOutputDir()
+    if not args.output.is_dir():
+        print("Can't find file path " + str(args.output))
+        return 1
+
+    # Finds songs even if their case or punctuation isn't the same as the file name
+    index = getSongIndex()
+    search = getSearchIndex()
+    setlists = [(name, [(song if song in index.entries else search.resolve(song) or song, key) for song, key in setlist])
+                for name, setlist in setlists]
+
+    # Checks every setlist before rendering any
+    valid = []
+    for name, setlist in setlists:
+        errors = checkSetlist(index, name, setlist)
+        if errors:
+            print("\n".join(errors))
+        else:
+            valid.append((name, setlist))
+
+    # Skips charts built from the same songs, keys and settings (unless forced)
+    build = BuildManifest(args.output)
+    digests = {}
+    stale, skipped = [], []
+    for name, setlist in valid:
+        digests[name] = build.digest(index, setlist, {"pdf": args.pdf, "reorder": args.reorder, "variants": args.variants})
+        files = [args.output / f"{variantName(name, v)}.{ext}" for v in args.variants
+                 for ext in (["docx", "pdf"] if args.pdf else ["docx"])]
+        if not args.force and build.upToDate(name, digests[name], files):
+            skipped.append(name)
+        else:
+            stale.append((name, setlist))
+
+    template = docTemplate()
+
+    numSongs = 0
+    written, failed = 0, 0
+    try:
+        results = saveSetlists(template, stale, args)
+        for (name, setlist), error in zip(stale, results):
+            if error:
+                print(error)
+                failed += 1
+                continue
+            build.record(name, digests[name])
+            written += 1
+            numSongs += len(setlist)
+            print(f"Wrote {name}.")
+    finally:
+        # Records the charts already written, even if writing the rest failed
+        build.save()
+
+    if skipped:
+        print(f"\nSkipped {len(skipped)} unchanged setlists: {', '.join(skipped)}")
+
+    elapsed = perf_counter() - start
+    print(f"\nWrote {written} of {len(setlists)} setlists ({numSongs} songs) in {elapsed:.2f} s " +
+          f"({numSongs / elapsed:.1f} songs/sec).")
+    if failed:
+        print(f"Failed to write {failed} of {len(stale)} setlists.")
+
+    return 0 if len(valid) == len(setlists) and not failed else 1
+
+
+## @brief          Generates the chart for every setlist in a manifest, saving the stats and profile if asked.
+#  @param[in] args The command line arguments (defaults to sys.argv).
+#  @return         The exit code: 0 if every setlist was generated and 1 otherwise.
+def main(args=None):
+    args = parseArgs(args)
+
+    stats.startProfile(args.profile)
+    with stats.profiled():
+        code = generate(args)
+    stats.saveProfile()
+
+    if args.stats:
+        stats.dump(args.stats)
+        print(f"\n{stats.summary()}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+## @file   Benchmark.py
+#  @brief  Measures the throughput and memory of each stage of writing charts, on the song files and on
+#          synthetic libraries, and compares them to a saved baseline.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import json
+import platform
+import random
+import sys
+import tracemalloc
+
+from argparse import ArgumentParser
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from docx.oxml.ns import qn
+
+import Document
+
+from Compiler import compileToken, realize
+from Document import docFromTemplate, docTemplate, renderSong, writeLine
+from Helpers import FileError, checkValidChord, getNotes, numList, tonics
+from Index import SongIndex
+from Layout import songHeight
+from Pdf import pdfSetup, renderSong as pdfRenderSong
+from Search import SearchIndex
+from Songs import Song, readLines
+from Stream import StreamingDocument
+
+CORPUS = Path("dist/src/songs")
+REPEATS = 20
+
+## @brief The default file the baseline is saved to and compared against.
+BASELINE = Path("benchmark.json")
+
+## @brief The default numbers of songs in the synthetic libraries.
+SYNTHETIC_SIZES = [1000, 10000]
+
+## @brief The seed of the random songs of the synthetic libraries, so every run writes the same songs.
+SEED = 2026
+
+## @brief The key songs are written in by the stages that write documents.
+KEY = "G"
+
+## @brief The keys the stages that transpose are run in (every major and minor key, without modes or a capo).
+KEYS = sorted(tonic + suffix for tonic in tonics for suffix in ["", "m"])
+
+## @brief The fraction a stage can be slower than the baseline before it is reported as a regression.
+REGRESSION = 0.2
+
+## @brief The most times a stage is run to time it, and the number of seconds after which it isn't run
+#         again. The fastest run is used, since slower runs are slowed down by other programs.
+BEST_OF = 5
+MIN_TIME = 1.0
+
+
+## @brief              Converts a Roman numeral to a chord by slicing it, one part at a time.
+#  @details            The chord parser songs were converted with before they were compiled (see
+#                      Compiler.compileToken), kept to compare the speed of compiling chords with.
+#  @param[in] noteList A list of notes in the key of the song (from getNotes).
+#  @param[in] chord    The chord from the song file (represented as a Roman numeral).
+#  @param[in] fileName The name of the song file (for the error message).
+#  @return             The chord converted from the Roman numeral.
+#  @throw              FileError if the chord isn't valid.
+def convertChord(noteList, chord, fileName):
+    if chord.count("/") == 1:
+        chord = chord.split("/")
+        chord = f"{convertChord(noteList, chord[0], fileName)}/" + \
+                f"{convertChord(noteList, chord[1].upper(), fileName)}"
+
+    elif chord.endswith("sus"):
+        # Checks if suspended chord is minor, and retrieves it from list if it is NOT
+        if not chord[:-3].isupper():
+            raise FileError(f"Suspended chords aren't minor (see \"{chord}\").")
+        chord = f"{convertChord(noteList, chord[:-3], fileName)}sus"
+
+    else:
+        # Checks if chord is valid, and retrieves it from list if it is
+        if chord.lower() not in numList:
+            raise FileError(f"The chord \"{chord}\" in {fileName} isn't recognized.")
+        # Ternary statement handles if chord is minor
+        chord = noteList[numList.index(chord.lower())] + ("m" if chord.islower() else "")
+
+    return chord
+
+
+## @brief          Gets the tokens after the section names from every song file in a folder.
+#  @param[in] path The folder with the song files.
+#  @return         A list of the tokens found in the song files.
+def corpusTokens(path=CORPUS):
+    tokens = []
+
+    for file in sorted(path.glob("*.txt")):
+        with file.open() as fp:
+            lines = fp.readlines()
+
+        for line in lines[1:]:
+            # Skips section names, which end with a colon
+            inSection = True
+            for c in line.split():
+                if inSection:
+                    inSection = not c.endswith(":")
+                elif c == "same":
+                    inSection = True
+                else:
+                    tokens.append(c)
+
+    return tokens
+
+
+## @brief          Gets the chords (without parentheses) from every song file in a folder.
+#  @param[in] path The folder with the song files.
+#  @return         A list of the chords found in the song files.
+def corpusChords(path=CORPUS):
+    chords = []
+    for c in corpusTokens(path):
+        c = c.strip("()")
+        if c not in {"|", "new"} and not (c[0] == "x" and c[1:].isdecimal()):
+            chords.append(c)
+    return chords
+
+
+## @brief          Reads every valid song file in a folder.
+#  @param[in] path The folder with the song files.
+#  @return         A dictionary of the contents of each song file by its name.
+def corpusFiles(path=CORPUS):
+    files = {}
+    for file in sorted(path.glob("*.txt")):
+        data = file.read_bytes()
+        try:
+            Song(file.stem, readLines(data)).ir
+            files[file.stem] = data
+        except Exception:
+            # Invalid songs would stop every stage, so they aren't benchmarked
+            pass
+    return files
+
+
+## @brief           Makes a library of random songs from the lines of real songs.
+#  @param[in] files The contents of the real song files by name (see corpusFiles).
+#  @param[in] count The number of songs to make.
+#  @param[in] seed  The seed of the random songs.
+#  @return          A dictionary of the contents of each song file by its name.
+def syntheticFiles(files, count, seed=SEED):
+    rng = random.Random(seed)
+    lines = [line for data in files.values() for line in readLines(data)[1:] if line.strip()]
+    words = [word for name in files for word in name.split()]
+
+    synthetic = {}
+    for i in range(count):
+        name = f"{' '.join(rng.choices(words, k=rng.randint(1, 4)))} {i}"
+        body = "".join(line if line.endswith("\n") else line + "\n" for line in rng.choices(lines, k=rng.randint(3, 8)))
+        synthetic[name] = f"{name}\n{body}".encode()
+    return synthetic
+
+
+## @brief             Times a stage (see BEST_OF), then measures its peak memory by running it again.
+#  @param[in] run     The stage, which can be run more than once.
+#  @param[in] count   The number of things the stage does (eg. songs written).
+#  @param[in] unit    What the stage does (eg. "songs").
+#  @param[in] memory  True if the peak memory should be measured and False otherwise.
+#  @return            A dictionary of the count, unit, seconds, rate (count per second) and peak
+#                     memory (in bytes, or None if it wasn't measured).
+def measure(run, count, unit, memory):
+    times = []
+    while len(times) < BEST_OF and sum(times) < MIN_TIME:
+        start = perf_counter()
+        run()
+        times.append(perf_counter() - start)
+    seconds = min(times)
+
+    peak = None
+    if memory:
+        # Tracing memory slows the stage down, so it isn't timed
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"count": count, "unit": unit, "seconds": seconds, "rate": count / seconds, "peak": peak}
+
+
+## @brief           Gets the stages that test the song files and the code that reads them.
+#  @param[in] files The contents of the song files by name (see corpusFiles).
+#  @param[in] path  The folder with the song files (for the tokens and chords).
+#  @return          A list of (stage name, stage, count, unit).
+def corpusStages(files, path):
+    tokens = corpusTokens(path)
+    chords = corpusChords(path)
+    keys = KEYS
+    noteLists = [getNotes(k) for k in keys]
+    songs = [Song(name, readLines(data)) for name, data in files.items()]
+    lines = [realize(song.ir, KEY) for song in songs]
+    template = docTemplate()
+
+    def repeat(function, items, repeats=REPEATS):
+        def run():
+            for _ in range(repeats):
+                for item in items:
+                    function(item)
+        return run
+
+    def parse():
+        for name, data in files.items():
+            Song(name, readLines(data)).ir
+
+    def realizeAll():
+        for song in songs:
+            for key in keys:
+                realize(song.ir, key)
+
+    def layout():
+        for song, songLines in zip(songs, lines):
+            songHeight(song, KEY, songLines)
+
+    def writeLines():
+        doc = docFromTemplate(template)
+        for songLines in lines:
+            for i, line in enumerate(songLines):
+                writeLine(doc, line, i == len(songLines) - 1)
+
+    def writeSongs():
+        doc, pageHeight = docFromTemplate(template), 0
+        for song in songs:
+            doc, pageHeight = renderSong(doc, pageHeight, song, KEY)
+        return doc
+
+    doc = writeSongs()
+
+    def writePdf():
+        pdf, pageHeight = pdfSetup(), 0
+        for song in songs:
+            pdf, pageHeight = pdfRenderSong(pdf, pageHeight, song, KEY)
+        with TemporaryDirectory() as temp:
+            pdf.save(Path(temp) / "benchmark.pdf")
+
+    return [
+        ("getNotes", repeat(getNotes, keys, REPEATS * 100), REPEATS * 100 * len(keys), "keys"),
+        ("convertChord", repeat(lambda c: convertChord(noteLists[0], c, ""), chords, REPEATS * len(keys)),
+         REPEATS * len(keys) * len(chords), "chords"),
+        ("checkValidChord", repeat(checkValidChord, tokens, REPEATS * len(keys)), REPEATS * len(keys) * len(tokens),
+         "tokens"),
+        ("compileToken", repeat(lambda c: compileToken(c, ""), tokens, REPEATS * len(keys)),
+         REPEATS * len(keys) * len(tokens), "tokens"),
+        ("parse", parse, len(files), "songs"),
+        ("realize", realizeAll, len(songs) * len(keys), "songs"),
+        ("layout", layout, len(songs), "songs"),
+        ("writeLine", writeLines, sum(len(songLines) for songLines in lines), "lines"),
+        ("writeSong", writeSongs, len(songs), "songs"),
+        ("save", lambda: doc.save(BytesIO()), len(songs), "songs"),
+        ("pdf", writePdf, len(songs), "songs"),
+    ]
+
+
+## @brief           Gets the stages that test a whole library of songs.
+#  @param[in] files The contents of the song files by name.
+#  @param[in] temp  A folder to write the song files, the index and the songbook in.
+#  @return          A list of (stage name, stage, count, unit).
+def libraryStages(files, temp):
+    folder = temp / "songs"
+    folder.mkdir()
+    for name, data in files.items():
+        (folder / f"{name}.txt").write_bytes(data)
+
+    def indexAll():
+        # Starts from an empty index each time, so every file is read and compiled
+        (temp / "songs.idx").unlink(missing_ok=True)
+        SongIndex(folder, temp / "songs.idx").update()
+
+    index = SongIndex(folder, temp / "songs.idx")
+    index.update()
+    songs = [index.entries[name][2] for name in index.names()]
+    titles = {song.name: song.title for song in songs}
+    lines = [realize(song.ir, KEY) for song in songs]
+    search = SearchIndex(titles, titles)
+    queries = [name[:n] for name in random.Random(SEED).sample(sorted(titles), min(200, len(titles))) for n in (2, 5, 9)]
+
+    def searchAll():
+        search.results.clear()
+        for query in queries:
+            search.search(query)
+
+    def layout():
+        for song, songLines in zip(songs, lines):
+            songHeight(song, KEY, songLines)
+
+    def songbook():
+        with StreamingDocument(temp / "songbook.docx", docTemplate()) as doc:
+            for song in songs:
+                doc.writeSong(song, KEY)
+
+    return [
+        ("index", indexAll, len(files), "songs"),
+        ("searchIndex", lambda: SearchIndex(titles, titles), len(titles), "songs"),
+        ("search", searchAll, len(queries), "queries"),
+        ("realize", lambda: [realize(song.ir, KEY) for song in songs], len(songs), "songs"),
+        ("layout", layout, len(songs), "songs"),
+        ("songbook", songbook, len(songs), "songs"),
+    ]
+
+
+## @brief           Gets a style and the styles it is based on.
+#  @param[in] style The style.
+#  @return          A list of the styles, starting with the style.
+def styleChain(style):
+    chain = []
+    while style is not None:
+        chain.append(style)
+        style = style.base_style
+    return chain
+
+
+## @brief            Gets the first property that is set.
+#  @param[in] values The property as set by each format, in the order they apply.
+#  @return           The property, or None if it isn't set by any format.
+def firstSet(values):
+    return next((value for value in values if value is not None), None)
+
+
+## @brief          Gets the text and formatting of every character written to a document.
+#  @details        Formatting is resolved through the styles of runs and paragraphs, so formatting set
+#                  directly on a run or paragraph and formatting set by its style are the same.
+#  @param[in] doc  The document.
+#  @return         A list of the paragraph formatting (alignment, spacing before and after, line spacing,
+#                  page break and tab stops) and (character, size, underline) of each character of each
+#                  paragraph, where tabs and line breaks are characters.
+def formattedText(doc):
+    paragraphs = []
+    for p in doc.paragraphs:
+        styles = styleChain(p.style)
+        formats = [p.paragraph_format] + [style.paragraph_format for style in styles]
+        paragraph = (firstSet(f.alignment for f in formats), firstSet(f.space_before for f in formats),
+                     firstSet(f.space_after for f in formats), firstSet(f.line_spacing for f in formats),
+                     firstSet(f.page_break_before for f in formats),
+                     firstSet([(t.position, t.alignment) for t in f.tab_stops] or None for f in formats))
+
+        chars = []
+        for run in p.runs:
+            fonts = [run.font] + [style.font for style in styleChain(run.style) + styles]
+            font = (firstSet(f.size for f in fonts), firstSet(f.underline for f in fonts))
+            for child in run._r:
+                if child.tag == qn("w:t"):
+                    text = child.text
+                else:
+                    text = {qn("w:tab"): "\t", qn("w:br"): "\n", qn("w:cr"): "\n"}.get(child.tag, "")
+                chars += [(c, *font) for c in text]
+        paragraphs.append((paragraph, chars))
+    return paragraphs
+
+
+## @brief           Compares writing lines with merged runs (see Document.mergeRuns) to a run for each segment.
+#  @param[in] files The contents of the song files by name (see corpusFiles).
+#  @return          True if both write the same text with the same formatting and False otherwise.
+def compareRuns(files):
+    songs = [Song(name, readLines(data)) for name, data in files.items()]
+    template = docTemplate()
+    results = []
+
+    for merge in (lambda segments: segments, Document.mergeRuns):
+        merged = Document.mergeRuns
+        Document.mergeRuns = merge
+        try:
+            doc, pageHeight = docFromTemplate(template), 0
+            for song in songs:
+                doc, pageHeight = renderSong(doc, pageHeight, song, KEY)
+        finally:
+            Document.mergeRuns = merged
+
+        runs = len(doc.element.body.findall(".//" + qn("w:r")))
+        times = []
+        for _ in range(BEST_OF):
+            out = BytesIO()
+            start = perf_counter()
+            doc.save(out)
+            times.append(perf_counter() - start)
+        results.append((runs, len(out.getvalue()), min(times), formattedText(doc)))
+
+    (runs, size, save, before), (mergedRuns, mergedSize, mergedSave, after) = results
+    same = before == after
+    print(f"{'Runs':<20} {runs:>10,} -> {mergedRuns:>10,} ({runs / mergedRuns:.1f}x fewer)")
+    print(f"{'File size (bytes)':<20} {size:>10,} -> {mergedSize:>10,} ({mergedSize / size:.0%})")
+    print(f"{'Save time (s)':<20} {save:>10.4f} -> {mergedSave:>10.4f} ({save / mergedSave:.1f}x faster)")
+    print(f"{'Same output':<20} {'yes' if same else 'NO'}")
+    return same
+
+
+## @brief             Runs stages, printing the result of each (compared to the baseline, if given).
+#  @param[in] library The name of the library the stages test.
+#  @param[in] stages  A list of (stage name, stage, count, unit).
+#  @param[in] options The command line arguments (see parseArgs).
+#  @param[in] results The results to add the results of the stages to, by "library/stage name".
+#  @param[in] old     The results of the baseline.
+#  @return            The names of the stages that were slower than the baseline.
+def runStages(library, stages, options, results, old):
+    slower = []
+    for name, run, count, unit in stages:
+        if options.stages and name not in options.stages:
+            continue
+
+        stage = f"{library}/{name}"
+        result = results[stage] = measure(run, count, unit, options.memory)
+
+        line = f"{stage:<28} {result['rate']:>14,.0f} {unit + '/sec':<12} {result['seconds']:>8.3f} s"
+        if result["peak"] is not None:
+            line += f" {result['peak'] / 2 ** 20:>9.1f} MiB"
+
+        if stage in old:
+            ratio = result["rate"] / old[stage]["rate"]
+            line += f" {ratio:>6.2f}x"
+            if ratio < 1 - REGRESSION:
+                line += " (slower)"
+                slower.append(stage)
+
+        print(line, flush=True)
+    return slower
+
+
+## @brief          Gets the command line arguments for the benchmarks.
+#  @param[in] args The arguments to parse (defaults to the command line).
+#  @return         The parsed arguments.
+def parseArgs(args=None):
+    parser = ArgumentParser(description="Measures the throughput and memory of each stage of writing charts.")
+    parser.add_argument("corpus", nargs="?", type=Path, default=CORPUS, help="the folder with the song files to test")
+    parser.add_argument("--sizes", nargs="*", type=int, default=SYNTHETIC_SIZES,
+                        help="the numbers of songs in the synthetic libraries (eg. 1000 10000 100000)")
+    parser.add_argument("--stages", nargs="+",
+                        help="only run the stages with these names (eg. writeSong save, or runs to compare merging runs)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="don't measure the peak memory of each stage (which runs each stage twice)")
+    parser.add_argument("--save", nargs="?", type=Path, const=BASELINE, help="save the results as the baseline")
+    parser.add_argument("--compare", nargs="?", type=Path, const=BASELINE,
+                        help="compare the results to the baseline, failing if a stage is more than "
+                             f"{REGRESSION:.0%} slower")
+    return parser.parse_args(args)
+
+
+## @brief          The main function that runs every benchmark.
+#  @param[in] args The command line arguments (defaults to sys.argv).
+#  @return         The exit code: 1 if a stage was slower than the baseline or merging runs changed the
+#                  output, and 0 otherwise.
+def main(args=None):
+    options = parseArgs(args)
+
+    old = {}
+    if options.compare:
+        try:
+            old = json.loads(options.compare.read_text())["stages"]
+        except (OSError, KeyError, ValueError):
+            print(f"No baseline saved at {options.compare} (save one with --save).")
+
+    files = corpusFiles(options.corpus)
+    print(f"{len(files)} songs in {options.corpus}")
+    print()
+
+    # Checks that merging runs doesn't change the output
+    same = True
+    if not options.stages or "runs" in options.stages:
+        same = compareRuns(files)
+        print()
+
+    results = {}
+    slower = runStages("corpus", corpusStages(files, options.corpus), options, results, old)
+    for size in options.sizes:
+        with TemporaryDirectory() as temp:
+            stages = libraryStages(syntheticFiles(files, size), Path(temp))
+            slower += runStages(f"synthetic-{size}", stages, options, results, old)
+
+    if options.save:
+        baseline = {"python": platform.python_version(), "machine": platform.machine(), "stages": results}
+        options.save.write_text(json.dumps(baseline, indent=2))
+        print(f"\nSaved the baseline to {options.save}.")
+
+    if not same:
+        print("\nMerging runs changed the text or formatting written.")
+    if slower:
+        print(f"\n{len(slower)} stages were more than {REGRESSION:.0%} slower than the baseline: {', '.join(slower)}")
+    return 0 if same and not slower else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+## @file   Build.py
+#  @brief  Contains the build manifest that records the inputs of each chart, to skip unchanged charts.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import json
+import os
+
+from hashlib import sha1
+from pathlib import Path
+
+from Fragments import styleDigest
+
+## @brief The name of the build manifest in the output directory.
+BUILD_FILE = ".worshiplist-build.json"
+
+## @brief Changes whenever the charts written for the same inputs change (so every chart is rebuilt).
+BUILD_VERSION = 1
+
+
+## @brief   A record of the inputs each chart in an output directory was last built from.
+#  @details Each chart's inputs (the contents of its song files, its keys, the style settings,
+#           the output options and the version of this program) are combined into one hash.
+#           A chart is up to date if its hash matches the one recorded and its files exist.
+class BuildManifest:
+    ## @brief            Loads the build manifest of an output directory (if it exists).
+    #  @param[in] output The output directory.
+    def __init__(self, output):
+        self.file = Path(output) / BUILD_FILE
+        self.style = styleDigest()
+        try:
+            with self.file.open() as fp:
+                self.charts = json.load(fp)
+            if not isinstance(self.charts, dict):
+                self.charts = {}
+        except (OSError, ValueError):
+            # A missing or corrupt manifest means every chart is rebuilt
+            self.charts = {}
+
+    ## @brief             Gets the hash of the inputs of a chart.
+    #  @param[in] index   The song index (see Index.SongIndex), with the hash of each song file.
+    #  @param[in] setlist A list of (song, key) pairs.
+    #  @param[in] options The output options that change the chart (eg. reordering and .pdf output).
+    #  @return            The hash as a string of hexadecimal digits.
+    def digest(self, index, setlist, options):
+        inputs = [BUILD_VERSION, self.style, options, [(song, index.digest(song), key) for song, key in setlist]]
+        return sha1(json.dumps(inputs).encode()).hexdigest()
+
+    ## @brief            Checks if a chart was built from the same inputs and its files still exist.
+    #  @param[in] name   The name of the chart.
+    #  @param[in] digest The hash of the inputs of the chart (see digest).
+    #  @param[in] files  The files the chart is saved as.
+    #  @return           True if the chart doesn't need to be rebuilt and False otherwise.
+    def upToDate(self, name, digest, files):
+        return self.charts.get(name) == digest and all(Path(file).is_file() for file in files)
+
+    ## @brief            Records the inputs a chart was built from.
+    #  @param[in] name   The name of the chart.
+    #  @param[in] digest The hash of the inputs of the chart (see digest).
+    def record(self, name, digest):
+        self.charts[name] = digest
+
+    ## @brief Writes the manifest to the output directory, replacing the old file only once it is complete.
+    def save(self):
+        temp = self.file.with_name(self.file.name + ".tmp")
+        with temp.open("w") as fp:
+            json.dump(self.charts, fp, indent=4, sort_keys=True)
+        os.replace(temp, self.file)
@@ -4,7 +4,8 @@
 #  @date   1/11/2021
 
 
-from Helpers import getValidSongs
+from Index import getSongIndex
+from Songs import getSong
 from collections import defaultdict
 
 
@@ -12,11 +13,9 @@ from collections import defaultdict
 def main():
     sections = defaultdict(int)
 
-    for s in getValidSongs():
-        with open(f"src/songs/{s}.txt", "r") as fp:
-            contents = fp.readlines()
-        for i in contents[1:]:
-            sections[i.split(":")[0]] += 1
+    for s in getSongIndex().names():
+        for section in getSong(s).sections:
+            sections[section] += 1
 
     for k, v in sorted(sections.items(), key=lambda kv: kv[1], reverse=True):
         print(k, v)
@@ -0,0 +1,191 @@
+## @file   Compiler.py
+#  @brief  Compiles song lines into a key-independent form and realizes them in a key.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+from enum import IntEnum, auto
+
+from Helpers import FileError, getNotes, matchToken, numerals
+from Stats import timed
+
+
+## @brief   The kinds of operations in a compiled line.
+#  @details Each operation is a tuple starting with its kind:
+#           (BAR,), (NEW,), (SAME, section name), (REPEAT, count) and
+#           (CHORD, degree, minor, sus, bass degree or None, opens small text, closes small text).
+class Op(IntEnum):
+    BAR = auto()
+    NEW = auto()
+    SAME = auto()
+    REPEAT = auto()
+    CHORD = auto()
+
+
+## @brief The maximum number of tokens to remember the operations of.
+TOKEN_CACHE_SIZE = 4096
+
+## @brief The operations of tokens already compiled (the same few tokens are used by every song).
+tokenOps = {}
+
+
+## @brief              Explains why a chord from a song file isn't valid.
+#  @details            Only used for tokens that don't match Helpers.tokenPattern, to name
+#                      the part of the chord that is wrong.
+#  @param[in] chord    The chord from the song file (without parentheses).
+#  @param[in] fileName The name of the song file.
+#  @return             The error to raise.
+def chordError(chord, fileName):
+    bass = None
+    if chord.count("/") == 1:
+        chord, bass = chord.split("/")
+
+    if chord.endswith("sus") and not chord[:-3].isupper():
+        return FileError(f"Suspended chords aren't minor (see \"{chord}\").")
+    elif chord.removesuffix("sus") not in numerals:
+        return FileError(f"The chord \"{chord.removesuffix('sus')}\" in {fileName} isn't recognized.")
+    elif bass is not None and bass not in numerals:
+        return FileError(f"The chord \"{bass.upper()}\" in {fileName} isn't recognized.")
+    return FileError(f"The chord \"{chord}/{bass}\" in {fileName} isn't recognized.")
+
+
+## @brief              Compiles a token after the section name in a song file.
+#  @param[in] c        The token.
+#  @param[in] fileName The name of the song file.
+#  @return             The operation of the token, where "same" is (SAME,) without the
+#                      section name that follows it.
+#  @throw              FileError if the token isn't valid.
+def compileToken(c, fileName):
+    op = tokenOps.get(c)
+    if op is not None:
+        return op
+
+    m = matchToken(c)
+    if m is None:
+        raise chordError(c[1 if c[0] == "(" else 0:-1 if c[-1] == ")" else None], fileName)
+
+    kind = m.lastgroup
+    if kind == "bar":
+        op = (Op.BAR,)
+    elif kind == "new":
+        op = (Op.NEW,)
+    elif kind == "same":
+        op = (Op.SAME,)
+    elif kind == "repeat":
+        op = (Op.REPEAT, int(m["repeat"]))
+    else:
+        bass = m["bass"]
+        op = (Op.CHORD, numerals[m["major"] or m["minor"]], m["minor"] is not None, m["sus"] is not None,
+              None if bass is None else numerals[bass], m["open"] is not None, m["close"] is not None)
+
+    if len(tokenOps) < TOKEN_CACHE_SIZE:
+        tokenOps[c] = op
+    return op
+
+
+## @brief              Reads a section name (which ends with a colon) from a line.
+#  @param[in] line     The tokens of the line.
+#  @param[in] ind      The index of the first token of the section name.
+#  @param[in] fileName The name of the song file.
+#  @return             The section name and the index after it.
+#  @throw              FileError if the section name doesn't end with a colon.
+def readSection(line, ind, fileName):
+    end = ind
+    while end < len(line) and line[end][-1] != ":":
+        end += 1
+
+    if end == len(line):
+        raise FileError(f"The section \"{' '.join(line[ind:])}\" in {fileName} is missing a colon.")
+
+    return " ".join(line[ind:end + 1]), end + 1
+
+
+## @brief              Compiles a line of a song file.
+#  @param[in] line     The tokens of the line.
+#  @param[in] fileName The name of the song file.
+#  @return             The section name and a tuple of operations.
+#  @throw              FileError if the line isn't valid.
+def compileLine(line, fileName):
+    section, i = readSection(line, 0, fileName)
+    ops = []
+
+    while i != len(line):
+        op = compileToken(line[i], fileName)
+        i += 1
+        if op[0] == Op.SAME:
+            name, i = readSection(line, i, fileName)
+            op = (Op.SAME, name)
+        ops.append(op)
+
+    return section, tuple(ops)
+
+
+## @brief              Compiles the lines of a song file into a key-independent form.
+#  @param[in] lines    The tokens of each line after the title.
+#  @param[in] fileName The name of the song file.
+#  @return             A tuple of compiled lines.
+#  @throw              FileError if any line isn't valid.
+@timed("parse")
+def compileLines(lines, fileName):
+    return tuple(compileLine(line, fileName) for line in lines)
+
+
+## @brief              Gets the name of a compiled chord.
+#  @param[in] noteList A list of notes in the key of the song.
+#  @param[in] op       The CHORD operation.
+#  @return             The name of the chord.
+def chordName(noteList, op):
+    _, degree, minor, sus, bass, _, _ = op
+    chord = noteList[degree] + ("m" if minor else "") + ("sus" if sus else "")
+    if bass is not None:
+        chord += "/" + noteList[bass]
+    return chord
+
+
+## @brief              Realizes a compiled line in a key.
+#  @param[in] line     The compiled line.
+#  @param[in] noteList A list of notes in the key of the song.
+#  @return             A list of (text, small) pairs, where small is True for small text.
+def realizeLine(line, noteList):
+    section, ops = line
+    segments = [(section + "\t", False)]
+
+    # Small text starts at "(" and ends after the separator following ")"
+    small = last = False
+
+    for i, op in enumerate(ops):
+        kind = op[0]
+        if kind == Op.BAR:
+            segments.append(("|", small))
+        elif kind == Op.NEW:
+            segments.append(("\n", small))
+        elif kind == Op.SAME:
+            segments.append(("|  ", small))
+            segments.append((op[1] + "  ", small))
+        elif kind == Op.REPEAT:
+            segments.append((f"x{op[1] or ''}", small))
+        else:
+            text = ("(" if op[5] else "") + chordName(noteList, op) + (")" if op[6] else "")
+            if op[6]:
+                small = last = True
+            elif op[5]:
+                small = True
+            segments.append((text, small))
+
+        # Adds space after chord
+        if i != len(ops) - 1:
+            segments.append(("\t" if kind == Op.NEW else "  ", small))
+            if last:
+                small = last = False
+
+    return segments
+
+
+## @brief         Realizes compiled lines in a key.
+#  @param[in] ir  The compiled lines.
+#  @param[in] key The key of the song.
+#  @return        A list of realized lines (see realizeLine).
+#  @throw         ParamError if the key isn't valid.
+@timed("transpose")
+def realize(ir, key):
+    noteList = getNotes(key)
+    return [realizeLine(line, noteList) for line in ir]
@@ -3,16 +3,28 @@
 #  @author Samuel Crawford
 #  @date   9/28/2023
 
-import win32com.client
-
-from enum import Enum, auto
-from pathlib import Path
+from io import BytesIO
 
 from docx import Document
 from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK, WD_TAB_ALIGNMENT
-
-from Helpers import getChord, getNotes
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_TAB_ALIGNMENT
+
+from Compiler import realize
+from Helpers import spellKey
+from Layout import FONT, FONT_SIZE, KEY_SIZE, LINE_SPACING, MARGIN, SMALL_SIZE, SONG_SPACING, TAB_STOP, \
+    TITLE_SIZE, pageBreak, songHeight
+from Songs import getSong
+from Stats import timed
+from Word import getConverter
+
+## @brief The names and IDs of the styles of songs (defined by docSetup). Paragraphs and runs
+#         reference styles by ID, since python-docx finds a style by name by searching every style.
+TITLE_STYLE, TITLE_ID = "Song Title", "SongTitle"
+KEY_STYLE, KEY_ID = "Song Key", "SongKey"
+LINE_STYLE, LINE_ID = "Chord Line", "ChordLine"
+END_STYLE, END_ID = "Last Chord Line", "LastChordLine"
+SMALL_STYLE, SMALL_ID = "Small Chord", "SmallChord"
 
 
 ## @brief          Outputs a .pdf from a .docx file.
@@ -20,18 +32,8 @@ from Helpers import getChord, getNotes
 #  @param[in] pdf  The filename of the .pdf file.
 #  @return         True if the conversion was successful and False otherwise.
 def pdfWrite(docx, pdf):
-    word = win32com.client.DispatchEx('Word.Application')
-    success = False
-    try:
-        doc = word.Documents.Open(str(docx))
-        doc.SaveAs(str(pdf), FileFormat=17)
-        doc.Close()
-        success = True
-    except AttributeError:
-        pass
-    finally:
-        word.Quit()
-        return success
+    # Reuses the same instance of Word for every conversion
+    return getConverter().convert(docx, pdf)
 
 
 ## @brief  Sets up an empty document.
@@ -42,180 +44,164 @@ def docSetup():
     # Defines margins
 
     section = doc.sections[0]
-    section.left_margin = Inches(1)
-    section.right_margin = Inches(1)
+    section.left_margin = Inches(MARGIN)
+    section.right_margin = Inches(MARGIN)
 
     # Defines default style
 
     style = doc.styles['Normal']
     font = style.font
-    font.name = 'Calibri'
-    font.size = Pt(28)
+    font.name = FONT
+    font.size = Pt(FONT_SIZE)
+
+    # Defines the styles of songs, so each paragraph and run only names its style
+
+    title = doc.styles.add_style(TITLE_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    title.style_id = TITLE_ID
+    title.base_style = style
+    title.font.size = Pt(TITLE_SIZE)
+    title.font.underline = True
+    title.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title.paragraph_format.space_after = Pt(0)
+    title.paragraph_format.space_before = Pt(0)
+
+    titleKey = doc.styles.add_style(KEY_STYLE, WD_STYLE_TYPE.CHARACTER)
+    titleKey.style_id = KEY_ID
+    titleKey.font.size = Pt(KEY_SIZE)
+    titleKey.font.underline = True
+
+    line = doc.styles.add_style(LINE_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    line.style_id = LINE_ID
+    line.base_style = style
+    line.paragraph_format.tab_stops.add_tab_stop(Inches(TAB_STOP), WD_TAB_ALIGNMENT.LEFT)
+    line.paragraph_format.space_after = Pt(0)
+    line.paragraph_format.space_before = Pt(0)
+    line.paragraph_format.line_spacing = Pt(LINE_SPACING)
+
+    end = doc.styles.add_style(END_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    end.style_id = END_ID
+    end.base_style = line
+    end.paragraph_format.space_after = Pt(SONG_SPACING)
+
+    small = doc.styles.add_style(SMALL_STYLE, WD_STYLE_TYPE.CHARACTER)
+    small.style_id = SMALL_ID
+    small.font.size = Pt(SMALL_SIZE)
 
     return doc
 
 
-## @brief               Writes a song to doc.
-#  @param[in] doc       The document being generated.
-#  @param[in] lineCount A counter of how many lines have been printed.
-#  @param[in] fileName  The name of the song file.
-#  @param[in] key       The key of the song.
-#  @return              The document (doc) and line counter (lineCount).
-def writeSong(doc, lineCount, fileName, key):
-    with Path(f"src/songs/{fileName}.txt").open() as fp:
-        lines = fp.readlines()
-
-    # Adds page break if song will get cut off
-    newLineLength = len(lines)
-    for line in lines:
-        if "new" in line.split():
-            newLineLength += 1
-
-    if lineCount + newLineLength > 15:
-        p = doc.add_paragraph()
-        run = p.add_run()
-        run.add_break(WD_BREAK.PAGE)
-        lineCount = newLineLength
-    else:
-        lineCount += newLineLength
+## @brief  Saves an empty document set up by docSetup to reuse for many documents.
+#  @return The bytes of the saved document.
+def docTemplate():
+    template = BytesIO()
+    docSetup().save(template)
+    return template.getvalue()
 
-    # Writes title
-    doc = writeTitle(doc, lines[0], key)
 
-    # Gets list of notes from getNotes(key)
-    noteList = getNotes(key)
+## @brief              Opens a new document from a template saved by docTemplate.
+#  @param[in] template The bytes of the saved document.
+#  @return             The document.
+def docFromTemplate(template):
+    return Document(BytesIO(template))
 
-    # Writes the lines with chords
-    for i in range(1, len(lines)):
-        line = lines[i].split()
-        end = i == len(lines) - 1
 
-        doc = writeLine(doc, line, end, noteList, fileName)
+## @brief                Writes a song to doc.
+#  @param[in] doc        The document being generated.
+#  @param[in] pageHeight The height already used on the current page, in points.
+#  @param[in] fileName   The name of the song file.
+#  @param[in] key        The key of the song.
+#  @param[in] fragments  The cache to copy the song from (see Fragments.FragmentCache), or None to write it.
+#  @return               The document (doc) and the updated used height (pageHeight).
+def writeSong(doc, pageHeight, fileName, key, fragments=None):
+    return renderSong(doc, pageHeight, getSong(fileName), key, fragments)
 
-    return doc, lineCount
 
+## @brief                Writes a parsed song to doc, starting a new page if it won't fit.
+#  @param[in] doc        The document being generated.
+#  @param[in] pageHeight The height already used on the current page, in points.
+#  @param[in] song       The parsed song (see Songs.Song).
+#  @param[in] key        The key of the song.
+#  @param[in] fragments  The cache to copy the song from (see Fragments.FragmentCache), or None to write it.
+#  @return               The document (doc) and the updated used height (pageHeight).
+def renderSong(doc, pageHeight, song, key, fragments=None):
+    lines = realize(song.ir, key)
+    newPage, pageHeight = pageBreak(pageHeight, songHeight(song, key, lines))
+    return placeSong(doc, song, key, newPage, lines, fragments), pageHeight
 
-## @brief            Writes a song title to the document.
-#  @param[in] doc    The document to write to.
-#  @param[in] title  The title to write to the document.
-#  @param[in] key    The key of the song.
-#  @return           The document.
-def writeTitle(doc, title, key):
-    p = doc.add_paragraph()
-    title = p.add_run(title.strip() + " ")
-    title.font.size = Pt(36)
-    title.underline = True
 
-    titleKey = p.add_run(f"({key})")
-    titleKey.font.size = Pt(20)
-    titleKey.underline = True
+## @brief               Writes a parsed song to doc.
+#  @param[in] doc       The document being generated.
+#  @param[in] song      The parsed song (see Songs.Song).
+#  @param[in] key       The key of the song.
+#  @param[in] newPage   True if the song starts a new page and False otherwise.
+#  @param[in] lines     The realized lines of the song (realized from song and key if not given).
+#  @param[in] fragments The cache to copy the song from (see Fragments.FragmentCache), or None to write it.
+#  @return              The document.
+@timed("docx")
+def placeSong(doc, song, key, newPage, lines=None, fragments=None):
+    if fragments is not None:
+        return fragments.place(doc, song, key, newPage, lines)
+
+    if lines is None:
+        lines = realize(song.ir, key)
+
+    # Writes title
+    doc = writeTitle(doc, song.title, key, newPage)
 
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p.paragraph_format.space_after = Pt(0)
-    p.paragraph_format.space_before = Pt(0)
+    # Writes the lines with chords in the given key
+    for i, line in enumerate(lines):
+        doc = writeLine(doc, line, i == len(lines) - 1)
 
     return doc
 
 
-## @brief          Writes a section name to the document.
-#  @param[in] p    The paragraph to write to.
-#  @param[in] line The line to get the section name from.
-#  @param[in] sep  The separator to use after the section name.
-#  @param[in] ind  The index to be read next.
-#  @return         The paragraph and the next index.
-def writeSection(p, line, sep, ind):
-    items = [line[ind]]
-    i = 0
-
-    while line[ind + i][-1] != ":":
-        i += 1
-        items.append(line[ind + i])
-
-    p.add_run(" ".join(items) + sep)
-    return p, ind + len(items)
-
-
-## @brief           Writes a line to the document.
-#  @param[in] doc   The document to write to.
-#  @param[in] line  The line to write to the document.
-#  @param[in] end   True if line is the last line in the song and False otherwise.
-#  @param[in] notes The list of valid notes.
-#  @param[in] file  The file with the line to write.
-#  @return          The document.
-def writeLine(doc, line, end, notes, file):
+## @brief             Writes a song title to the document.
+#  @param[in] doc     The document to write to.
+#  @param[in] title   The title to write to the document.
+#  @param[in] key     The key of the song.
+#  @param[in] newPage True if the title starts a new page and False otherwise.
+#  @return            The document.
+def writeTitle(doc, title, key, newPage=False):
     p = doc.add_paragraph()
+    p._p.style = TITLE_ID
+    p.add_run(title.strip() + " ")
+    p.add_run(f"({spellKey(key)})")._r.style = KEY_ID
+
+    if newPage:
+        p.paragraph_format.page_break_before = True
+
+    return doc
+
 
-    # Defines tab stops
-    tab_stops = p.paragraph_format.tab_stops
-    tab_stops.add_tab_stop(Inches(1.58), WD_TAB_ALIGNMENT.LEFT)
-
-    # Defines relative font size based on song file
-    class Size(Enum):
-        NORMAL = auto()
-        SMALL = auto()
-        SMALL_LAST = auto()
-
-    size = Size.NORMAL
-
-    # Index variable for chord
-    p, i = writeSection(p, line, "\t", 0)
-
-    # Adds all chords
-    lineLength = len(line)
-    while i != lineLength:
-        chord = line[i]
-        iNext = True
-        if chord == "|":
-            run = p.add_run("|")
-        elif chord == "new":
-            run = p.add_run("\n")
-        elif chord == "same":
-            run = p.add_run("|  ")
-            run, i = writeSection(p, line, "  ", i + 1)
-            iNext = False
-        elif chord[0] == "x" and len(chord) > 1 and chord[1:].isdecimal():
-            run = p.add_run(f"x{chord[1:].lstrip('0')}")
-        elif chord[0] == "(" and chord[-1] == ")":
-            run = p.add_run("(" + getChord(notes, chord[1:-1], file) + ")")
-            size = Size.SMALL_LAST
-        elif chord[0] == "(":
-            run = p.add_run("(" + getChord(notes, chord[1:], file))
-            size = Size.SMALL
-        elif chord[-1] == ")":
-            run = p.add_run(getChord(notes, chord[:-1], file) + ")")
-            size = Size.SMALL_LAST
+## @brief              Joins the adjacent segments of a line that have the same formatting.
+#  @details            Each segment would otherwise be its own run (w:r element) in the document,
+#                      so a line has one run for each part in or out of small text.
+#  @param[in] segments The realized line (see Compiler.realizeLine).
+#  @return             A list of (text, small) pairs, where no two adjacent pairs are both small or both not.
+def mergeRuns(segments):
+    runs = []
+    for text, small in segments:
+        if runs and runs[-1][1] == small:
+            runs[-1] = (runs[-1][0] + text, small)
         else:
-            run = p.add_run(getChord(notes, chord, file))
-
-        # Set font size for small text
-        if size in {Size.SMALL, Size.SMALL_LAST}:
-            run.font.size = Pt(22)
-
-        # Increments i if necessary
-        if iNext:
-            i += 1
-
-        # Adds space after chord
-        if i != lineLength:
-            if chord == "new":
-                run = p.add_run("\t")
-            else:
-                run = p.add_run("  ")
-
-            # Set font size for small text
-            if size == Size.SMALL:
-                run.font.size = Pt(22)
-            elif size == Size.SMALL_LAST:
-                run.font.size = Pt(22)
-                size = Size.NORMAL
-
-    # Sets paragraph spacing
-    if end:
-        p.paragraph_format.space_after = Pt(10)
-    else:
-        p.paragraph_format.space_after = Pt(0)
-
-    p.paragraph_format.space_before = Pt(0)
-    p.paragraph_format.line_spacing = Pt(36)
+            runs.append((text, small))
+    return runs
+
+
+## @brief              Writes a line to the document.
+#  @param[in] doc      The document to write to.
+#  @param[in] segments The realized line to write (see Compiler.realizeLine).
+#  @param[in] end      True if line is the last line in the song and False otherwise.
+#  @return             The document.
+def writeLine(doc, segments, end):
+    # The last line of a song has the space after the song
+    p = doc.add_paragraph()
+    p._p.style = END_ID if end else LINE_ID
+
+    # Adds the section name and all chords, with the small text style for small text
+    for text, small in mergeRuns(segments):
+        run = p.add_run(text)
+        if small:
+            run._r.style = SMALL_ID
 
     return doc
@@ -0,0 +1,53 @@
+## @file   Fonts.py
+#  @brief  Contains the metrics of the chart font (Calibri) for measuring text.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+## @brief   The advance widths of the characters 32 to 255 of the font's encoding (Windows-1252), in 1/1000 em.
+#  @details Accented letters are as wide as the letters they are made from. Codes with no character
+#           have the default width.
+WIDTHS = [
+    226, 326, 401, 498, 507, 715, 682, 221, 303, 303, 498, 498, 250, 306, 252, 386,  # " " to "/"
+    507, 507, 507, 507, 507, 507, 507, 507, 507, 507, 268, 268, 498, 498, 498, 463,  # "0" to "?"
+    894, 579, 544, 533, 615, 488, 459, 631, 623, 252, 319, 520, 420, 855, 646, 662,  # "@" to "O"
+    517, 673, 543, 459, 487, 642, 567, 890, 519, 487, 468, 307, 386, 307, 498, 498,  # "P" to "_"
+    291, 479, 525, 423, 525, 498, 305, 471, 525, 230, 239, 455, 230, 799, 525, 527,  # "`" to "o"
+    525, 525, 349, 391, 335, 525, 452, 715, 433, 453, 395, 314, 460, 314, 498, 507,  # "p" to 0x7F
+    507, 507, 250, 498, 418, 690, 498, 498, 498, 1062, 459, 271, 940, 507, 468, 507,  # 0x80 to 0x8F
+    507, 250, 250, 418, 418, 498, 498, 905, 498, 705, 391, 271, 872, 507, 395, 487,  # 0x90 to 0x9F
+    226, 326, 498, 507, 498, 507, 460, 498, 498, 847, 400, 455, 498, 306, 847, 498,  # 0xA0 to 0xAF
+    342, 498, 335, 335, 498, 537, 586, 252, 498, 335, 413, 455, 780, 780, 780, 463,  # 0xB0 to 0xBF
+    579, 579, 579, 579, 579, 579, 812, 533, 488, 488, 488, 488, 252, 252, 252, 252,  # 0xC0 to 0xCF
+    625, 646, 662, 662, 662, 662, 662, 498, 662, 642, 642, 642, 642, 487, 517, 527,  # 0xD0 to 0xDF
+    479, 479, 479, 479, 479, 479, 774, 423, 498, 498, 498, 498, 230, 230, 230, 230,  # 0xE0 to 0xEF
+    528, 525, 527, 527, 527, 527, 527, 498, 527, 525, 525, 525, 525, 453, 525, 453,  # 0xF0 to 0xFF
+]
+
+## @brief The first character code in WIDTHS.
+FIRST_CHAR = 32
+
+## @brief The width of a control character, in 1/1000 em.
+DEFAULT_WIDTH = 507
+
+## @brief The distances above and below the baseline used by Word for single spacing, in em.
+ASCENT = 0.952
+DESCENT = 0.269
+
+## @brief The height of a line with single spacing, in em.
+LINE_HEIGHT = ASCENT + DESCENT
+
+## @brief The bounding box of the font, in 1/1000 em.
+BBOX = [-503, -313, 1240, 1026]
+
+
+## @brief          Measures the width of text.
+#  @details        Characters outside Windows-1252 are measured as "?", which is how they are
+#                  written to a .pdf file (see Pdf.pdfString).
+#  @param[in] text The text to measure (without tabs or line breaks).
+#  @param[in] size The font size in points.
+#  @return         The width of the text in points.
+def textWidth(text, size):
+    total = 0
+    for b in text.encode("cp1252", "replace"):
+        total += WIDTHS[b - FIRST_CHAR] if b >= FIRST_CHAR else DEFAULT_WIDTH
+    return total * size / 1000
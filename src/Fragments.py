@@ -0,0 +1,205 @@
+## @file   Fragments.py
+#  @brief  Contains the on-disk cache of rendered songs, which are copied into documents.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import os
+import re
+
+from hashlib import sha1
+from pathlib import Path
+from threading import Lock
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+import Layout
+
+from Document import docFromTemplate, docTemplate, placeSong
+
+FRAGMENT_DIR = Path("src/fragments")
+
+## @brief The default maximum size of the cache, in bytes.
+FRAGMENT_LIMIT = 32 * 2 ** 20
+
+## @brief Changes whenever the paragraphs written by Document.placeSong change.
+FRAGMENT_VERSION = 5
+
+## @brief The settings from Layout.py that change how a song is written to a document.
+STYLE_SETTINGS = ("FONT", "FONT_SIZE", "TITLE_SIZE", "KEY_SIZE", "SMALL_SIZE", "LINE_SPACING", "SONG_SPACING",
+                  "MARGIN", "TAB_STOP")
+
+
+## @brief              Splits the document part of a .docx file around where paragraphs go.
+#  @param[in] document The bytes of the document part (word/document.xml) of an empty document.
+#  @return             The start of the part (up to the first paragraph), the end of the part (from
+#                      the section properties), and a pattern matching the namespace declarations
+#                      of the document element.
+def splitDocument(document):
+    split = document.rindex(b"<w:sectPr")
+    root = re.search(rb"<w:document[^>]*>", document).group()
+    namespaces = re.compile(b"|".join(re.escape(ns) for ns in re.findall(rb' xmlns:\w+="[^"]*"', root)))
+    return document[:split], document[split:], namespaces
+
+
+## @brief                Removes every paragraph from a document and serializes them.
+#  @param[in] doc        The document.
+#  @param[in] namespaces The namespace declarations to leave out (see splitDocument), which are
+#                        already declared by the document element the paragraphs are written in.
+#  @return               The XML of the paragraphs.
+def takeBody(doc, namespaces):
+    xml = []
+    body = doc.element.body
+    for element in list(body):
+        if element.tag != qn("w:sectPr"):
+            xml.append(namespaces.sub(b"", etree.tostring(element, encoding="UTF-8")))
+            body.remove(element)
+    return b"".join(xml)
+
+
+## @brief  Gets a hash of the settings that change how a song is written to a document.
+#  @return The hash as a string of hexadecimal digits.
+def styleDigest():
+    settings = [FRAGMENT_VERSION] + [getattr(Layout, name) for name in STYLE_SETTINGS]
+    return sha1(repr(settings).encode()).hexdigest()
+
+
+## @brief          Gets a hash of the contents of a parsed song.
+#  @param[in] song The parsed song (see Songs.Song).
+#  @return         The hash as a string of hexadecimal digits.
+def songDigest(song):
+    return sha1(repr((song.title, song.lines)).encode()).hexdigest()
+
+
+## @brief   A cache of the paragraphs written for a song in a key, stored as XML files.
+#  @details Each fragment is the title and lines written by Document.placeSong, without a
+#           page break, named by a hash of the song's contents, the key and the style settings
+#           (so changing any of them writes a new fragment). When the cache grows past its
+#           limit, the least recently used fragments are deleted.
+class FragmentCache:
+    ## @brief           Creates a cache in a folder (which is made if it doesn't exist).
+    #  @param[in] path  The folder the fragments are saved in.
+    #  @param[in] limit The maximum size of the fragments, in bytes.
+    def __init__(self, path=FRAGMENT_DIR, limit=FRAGMENT_LIMIT):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.limit = limit
+        self.style = styleDigest()
+        self.lock = Lock()
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+
+        # Songs are rendered in a scratch document, then removed from it once saved as fragments
+        self.doc = docFromTemplate(docTemplate())
+        document = etree.tostring(self.doc.element, encoding="UTF-8")
+        self.root = re.search(rb"<w:document[^>]*>", document).group()
+        self.namespaces = splitDocument(document)[2]
+
+    ## @brief          Gets the file of a fragment.
+    #  @param[in] song The parsed song (see Songs.Song).
+    #  @param[in] key  The key of the song.
+    #  @return         The path of the file.
+    def file(self, song, key):
+        return self.path / (sha1(f"{songDigest(song)} {key} {self.style}".encode()).hexdigest() + ".xml")
+
+    ## @brief           Gets the fragment of a song, writing it if it isn't cached.
+    #  @param[in] song  The parsed song (see Songs.Song).
+    #  @param[in] key   The key of the song.
+    #  @param[in] lines The realized lines of the song (realized from song and key if not given).
+    #  @return          The XML of the fragment.
+    def get(self, song, key, lines=None):
+        file = self.file(song, key)
+        try:
+            fragment = file.read_bytes()
+            # Marks the fragment as recently used
+            os.utime(file)
+            self.hits += 1
+            return fragment
+        except OSError:
+            pass
+
+        with self.lock:
+            self.doc = placeSong(self.doc, song, key, False, lines)
+            fragment = takeBody(self.doc, self.namespaces)
+        self.misses += 1
+
+        # Writes to a temporary file first so other processes never read part of a fragment
+        temp = file.with_name(f"{file.stem}.{os.getpid()}.tmp")
+        try:
+            temp.write_bytes(fragment)
+            os.replace(temp, file)
+            self.added(len(fragment))
+        except OSError:
+            pass
+        return fragment
+
+    ## @brief             Copies a song into a document from its fragment.
+    #  @param[in] doc     The document being generated.
+    #  @param[in] song    The parsed song (see Songs.Song).
+    #  @param[in] key     The key of the song.
+    #  @param[in] newPage True if the song starts a new page and False otherwise.
+    #  @param[in] lines   The realized lines of the song (realized from song and key if not given).
+    #  @return            The document.
+    def place(self, doc, song, key, newPage, lines=None):
+        fragment = self.get(song, key, lines)
+        body = doc.element.body
+        for i, element in enumerate(parse_xml(self.root + b"<w:body>" + fragment + b"</w:body></w:document>")[0]):
+            if i == 0 and newPage:
+                Paragraph(element, None).paragraph_format.page_break_before = True
+            body.insert_element_before(element, "w:sectPr")
+        return doc
+
+    ## @brief          Counts a new fragment towards the size of the cache, removing old ones if needed.
+    #  @param[in] size The size of the new fragment, in bytes.
+    def added(self, size):
+        with self.lock:
+            if self.size is None:
+                self.size = sum(f.stat().st_size for f in self.path.glob("*.xml"))
+            else:
+                self.size += size
+            if self.size > self.limit:
+                self.evict()
+
+    ## @brief Removes the least recently used fragments until the cache is within its limit.
+    def evict(self):
+        files = []
+        for file in self.path.glob("*.xml"):
+            try:
+                stat = file.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, file))
+            except OSError:
+                # Another process removed it
+                pass
+
+        self.size = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if self.size <= self.limit:
+                break
+            try:
+                file.unlink()
+            except OSError:
+                pass
+            self.size -= size
+
+    ## @brief Removes every fragment.
+    def clear(self):
+        with self.lock:
+            for file in self.path.glob("*.xml"):
+                file.unlink(missing_ok=True)
+            self.size = 0
+
+
+## @brief The fragment cache shared by the program (created by getFragmentCache).
+fragmentCache = None
+
+
+## @brief  Gets the shared fragment cache, creating it if needed.
+#  @return The fragment cache.
+def getFragmentCache():
+    global fragmentCache
+    if fragmentCache is None:
+        fragmentCache = FragmentCache()
+    return fragmentCache
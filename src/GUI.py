@@ -9,68 +9,110 @@ from datetime import date, timedelta
 from pathlib import Path
 from titlecase import titlecase
 
-from Helpers import checkFileName, checkValidChord, getValidSongs, \
-    reduceWhitespace, validKeys
-
-
-## @brief  Implements GUI for retrieving songs and keys.
-#  @return A list of songs, a list of their keys, and the chord sheet file name.
-def songGUI():
+from Helpers import checkFileName, checkKey, checkValidChord, checkVariant, reduceWhitespace
+from Library import getLibrary
+from Search import suggest
+from Songs import getSong
+from Worker import Job
+
+
+## @brief            Implements GUI for retrieving songs and keys, and writes each chart entered.
+#  @details          Charts are written by a worker thread, so the window stays open to show their
+#                    progress (or cancel them) and to enter the next chart while they are written.
+#                    The window is only made once: rows are added or hidden in place, and the songs
+#                    listed are only searched again when songs are typed or the library (see
+#                    Library.py) changes.
+#  @param[in] worker The worker that writes the charts (see Worker.ChartWorker).
+#  @return           True if charts that haven't been written should be cancelled, and False if the
+#                    window was closed without asking (so they should still be written).
+def songGUI(worker):
     numSongs = 4
-    songs, keys = [""] * numSongs, [""] * numSongs
-    makeNewWindow = True
+    search = getLibrary()
+    version = search.version
+    status, progress = "", (0, 1)
+
+    # Each combo only lists the songs best matching what has been typed in it
+    def songRow(i):
+        return [sg.Combo([""] + search.search(""), "", 37, key=f"-SONG{i}-"),
+                sg.InputText("", (12, None), key=f"-KEY{i}-")]
+
+    songDialogue = [
+        [sg.Text("Song", (35, 1)), sg.Text("Key")],
+        [sg.Column([songRow(i) for i in range(numSongs)], key="-ROWS-")],
+        buttonRow(["Change Number of Songs", "Add a New Song"], False),
+        [sg.HorizontalSeparator()],
+        [sg.Text("Enter a filename:")],
+        [sg.InputText("", key="-FILENAME-")],
+        [sg.Text("Also write with a capo or transposed (eg. \"capo 2, +2\"):")],
+        [sg.InputText("", key="-VARIANTS-")],
+        buttonRow(["OK", "Use Next Sunday", "Quit"], False),
+        [sg.HorizontalSeparator()],
+        [sg.Text(status, (48, 1), key="-STATUS-")],
+        [sg.ProgressBar(progress[1], "h", (30, 12), key="-PROGRESS-"), sg.Button("Cancel")]
+    ]
+
+    # Closing the window asks first, like Quit, so charts that haven't been written aren't lost
+    songWindow = sg.Window("WorshipList", enable_close_attempted_event=True).Layout(songDialogue).Finalize()
+    numRows = numSongs
+    for i in range(numRows):
+        songWindow[f"-SONG{i}-"].bind("<KeyRelease>", "TYPED")
 
     while True:
-        if makeNewWindow:
-            songsFromFile = getValidSongs()
-            songColumnList = [sg.Text("Song")]
-            keyColumnList = [sg.Text("Key")]
-
-            def songCombo(i, input=""):
-                if input and input not in songsFromFile:
-                    prepend = [input, ""]
+        # Wakes up regularly to show the progress of the worker
+        button, values = songWindow.Read(timeout=100)
+
+        if button == sg.TIMEOUT_KEY:
+            for kind, filename, value in worker.poll():
+                if kind == "progress":
+                    progress = value[:2]
+                    status = f"{filename}: {value[2]}"
+                elif kind == "saved":
+                    progress = (1, 1)
+                    status = f"{filename}: {value}"
+                elif kind == "cancelled":
+                    progress = (0, 1)
+                    status = f"{filename}: Cancelled."
                 else:
-                    prepend = [""]
-                return sg.Combo(prepend + songsFromFile, input, 37, key=f"-SONG{i}-")
-
-            def keyInput(i, input=""):
-                return sg.InputText(input, (5, None), key=f"-KEY{i}-")
+                    popupError(f"{filename}: {value}")
+                    status = f"{filename}: Failed."
+                songWindow["-STATUS-"].update(status)
+                songWindow["-PROGRESS-"].UpdateBar(*progress)
+
+            # Lists the songs again only if songs were added, removed or changed
+            if search.version != version:
+                version = search.version
+                for i in range(numRows):
+                    combo = f"-SONG{i}-"
+                    songWindow[combo].update(values[combo], [""] + search.search(values[combo]))
+
+        elif button == "Cancel":
+            if worker.busy():
+                worker.cancel()
+                status = "Cancelling..."
+                songWindow["-STATUS-"].update(status)
+
+        elif button and button.endswith("TYPED"):
+            # Updates the songs listed in a combo as the song is typed
+            combo = button.removesuffix("TYPED")
+            songWindow[combo].update(values[combo], [""] + search.search(values[combo]))
+
+        elif button in {"Quit", sg.WINDOW_CLOSE_ATTEMPTED_EVENT, None}:
+            if button and worker.busy() and popupWarn("Some charts haven't been written yet. Quit anyway?",
+                                                      False) == "Go Back":
+                continue
+            songWindow.close()
+            return button is not None
 
-            # TODO? Maybe Combo isn't the best implementation
-            for i in range(numSongs):
-                if i < len(songs):
-                    songColumnList.append(songCombo(i, songs[i]))
-                    keyColumnList.append(keyInput(i, keys[i]))
-                else:
-                    songColumnList.append(songCombo(i))
-                    keyColumnList.append(keyInput(i))
-
-            songDialogue = [
-                [sg.Column([[s] for s in songColumnList]),
-                 sg.Column([[k] for k in keyColumnList])],
-                [buttonRow(["Change Number of Songs", "Add a New Song"], False),
-                 [sg.HorizontalSeparator()],
-                 [sg.Text("Enter a filename:")],
-                 [sg.InputText("", key="-FILENAME-")],
-                 buttonRow(["OK", "Use Next Sunday", "Quit"], False)
-                 ]
-            ]
-
-            songWindow = sg.Window("WorshipList").Layout(songDialogue)
-
-        button, values = songWindow.Read()
-        makeNewWindow = True
-
-        if button in {"Quit", None}:
-            exit()
         else:
             songs, keys = [], []
 
             for i in range(numSongs):
-                songs.append(values[f"-SONG{i}-"].strip())
+                # Songs are found even if their case or punctuation isn't the same as the file name
+                song = values[f"-SONG{i}-"].strip()
+                songs.append(search.resolve(song) or song)
                 songWindow[f"-SONG{i}-"].update(songs[i])
 
-                key = values[f"-KEY{i}-"].strip()
+                key = reduceWhitespace(values[f"-KEY{i}-"])
                 if key:
                     key = key[0].upper() + key[1:].lower()
                 keys.append(key)
@@ -79,17 +121,37 @@ def songGUI():
             if button == "Change Number of Songs":
                 nonEmptyRows = [i for i in range(len(songs)) if songs[i] or keys[i]]
                 newNS = numSongsGUI(nonEmptyRows)
-                if newNS:
-                    numSongs = newNS
-                else:
-                    makeNewWindow = False
+                if not newNS:
+                    continue
+
+                # Adds rows that haven't been made yet, then shows only the rows needed
+                if newNS > numRows:
+                    songWindow.extend_layout(songWindow["-ROWS-"], [songRow(i) for i in range(numRows, newNS)])
+                    for i in range(numRows, newNS):
+                        songWindow[f"-SONG{i}-"].bind("<KeyRelease>", "TYPED")
+                    numRows = newNS
+                for i in range(numRows):
+                    if i < newNS:
+                        songWindow[f"-SONG{i}-"].unhide_row()
+                    else:
+                        songWindow[f"-SONG{i}-"].update("", [""] + search.search(""))
+                        songWindow[f"-KEY{i}-"].update("")
+                        songWindow[f"-SONG{i}-"].hide_row()
+                numSongs = newNS
 
             elif button == "Add a New Song":
-                makeNewWindow = addSongGUI()
+                # Lists the new song without waiting for the library to see it
+                if addSongGUI():
+                    search.refresh()
 
             else:
                 if not checkSongGUI(songs, keys):
-                    makeNewWindow = False
+                    continue
+
+                variants = [reduceWhitespace(v).lower() for v in values["-VARIANTS-"].split(",") if v.strip()]
+                invalid = [v for v in variants if not checkVariant(v)]
+                if invalid:
+                    popupError(f"\"{invalid[0]}\" is not a valid variant.")
                     continue
 
                 if button == "OK":
@@ -103,16 +165,15 @@ def songGUI():
                     nextSunday = today + timedelta(days=(6 - today.weekday()) % 7)
                     filename = f"Cornerstone {nextSunday.strftime('%F')}"
 
-                songWindow.close()
                 toDelete = [i for i, s in enumerate(songs) if not s]
 
                 def prune(xs):
                     return [x for i, x in enumerate(xs) if i not in toDelete]
 
-                return prune(songs), prune(keys), filename
-
-            if makeNewWindow:
-                songWindow.close()
+                # Writes the chart in the background, keeping the window open for the next one
+                worker.submit(Job(prune(songs), prune(keys), filename, variants))
+                status = f"{filename}: Queued." if worker.busy() > 1 else f"{filename}: Writing..."
+                songWindow["-STATUS-"].update(status)
 
 
 ## @brief       Implements a GUI for entering the number of songs to generate.
@@ -275,23 +336,25 @@ def checkSongGUI(songs, keys):
     ignoreEmptyFile = False
     ignoreDanglingKey = False
 
-    validSongs = getValidSongs()
+    library = getLibrary()
+    index = library.index
     for song, key in zip(songs, keys):
         if song:
-            if song not in validSongs:
-                return popupError(f"\"{song}\" not found in the songs directory.")
+            if song not in index.entries:
+                return popupError(f"\"{song}\" not found in the songs directory.{suggest(song, library)}")
+            elif index.error(song):
+                return popupError(index.error(song))
             elif not key:
                 return popupError(f"No key specified for \"{song}\".")
-            elif key not in validKeys:
+            elif not checkKey(key):
                 return popupError(f"\"{key}\" is not a valid key.")
 
-            with Path(f"src/songs/{song}.txt").open() as fp:
-                if len(fp.readlines()) == 1 and not ignoreEmptyFile:
-                    button = popupWarn(f"File for \"{song}\" has too few lines.")
-                    if button == "Go Back":
-                        return
-                    elif button == "Ignore All":
-                        ignoreEmptyFile = True
+            if not getSong(song).lines and not ignoreEmptyFile:
+                button = popupWarn(f"File for \"{song}\" has too few lines.")
+                if button == "Go Back":
+                    return
+                elif button == "Ignore All":
+                    ignoreEmptyFile = True
         else:
             if key and not ignoreDanglingKey:
                 button = popupWarn(f"No song name entered for key \"{key}\".")
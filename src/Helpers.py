@@ -3,16 +3,57 @@
 #  @author Samuel Crawford
 #  @date   9/28/2023
 
-from os import listdir
+import re
+
+from argparse import ArgumentTypeError
 from pathlib import Path
 from pathvalidate import is_valid_filename
 
 sharpNotes = ['F','F#','G','G#','A','A#','B','C','C#','D','D#','E'] * 2  # noqa: E231
 flatNotes = ['F','Gb','G','Ab','A','Bb','B','C','Db','D','Eb','E'] * 2  # noqa: E231
-validKeys = set(sharpNotes + flatNotes)
+tonics = set(sharpNotes + flatNotes)
+
+## @brief The letters of the notes in order, and the pitch (in semitones above C) of each natural note.
+letters = "CDEFGAB"
+naturals = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+## @brief The number of semitones from each degree of the major scale to the next.
+majorSteps = [2, 2, 1, 2, 2, 2, 1]
+
+## @brief   The mode of each suffix of a key, as the degree of the major scale the mode starts on.
+#  @details Keys are a tonic followed by a suffix (eg. "A" or "Ab" for major, "Am" for minor and
+#           "D dorian" for a mode).
+modes = {"": 0, "m": 5, " ionian": 0, " dorian": 1, " phrygian": 2, " lydian": 3, " mixolydian": 4,
+         " aeolian": 5, " locrian": 6}
+
+## @brief The pattern of a key, optionally played with a capo (eg. "Bb capo 3").
+keyPattern = re.compile(r"(?P<scale>[A-G][#b]?(?:m| [a-z]+)?)(?: capo (?P<capo>\d+))?")
+
+## @brief The highest fret a capo can be on.
+MAX_CAPO = 11
+
+## @brief   The pattern of a variant of a setlist, which changes the key of every song.
+#  @details A variant is empty (the keys as given), a capo (eg. "capo 2", the same keys played
+#           with a capo) or a transposition in semitones (eg. "+2" or "-3").
+variantPattern = re.compile(r"|capo (?P<capo>\d+)|(?P<semitones>[+-]\d+)")
 
 numList = ["i", "ii", "iii", "iv", "v", "vi", "vii"]
 
+## @brief The degree of the scale of each Roman numeral, in lower case (minor) or upper case (major).
+numerals = {n: i for i, n in enumerate(numList)} | {n.upper(): i for i, n in enumerate(numList)}
+
+# Longer numerals are tried first, so "IV" doesn't backtrack after matching "I"
+minorNumeral = "|".join(sorted(numList, key=len, reverse=True))
+majorNumeral = minorNumeral.upper()
+
+## @brief   The pattern of a token after the section name in a song file, matched in one pass.
+#  @details Each kind of token is a named group ("bar", "new", "same", "repeat" or "chord").
+#           A chord has the groups "open" and "close" (for parentheses), "major" or "minor"
+#           (the numeral), "sus" (only after a major numeral) and "bass" (in either case).
+tokenPattern = re.compile(r"(?P<bar>\|)|(?P<new>new)|(?P<same>same)|x(?P<repeat>\d+)|"
+                          rf"(?P<chord>(?P<open>\()?(?:(?P<major>{majorNumeral})(?P<sus>sus)?|(?P<minor>{minorNumeral}))"
+                          rf"(?:/(?P<bass>{majorNumeral}|{minorNumeral}))?(?P<close>\))?)")
+
 
 ## @brief   Exception for if a file is incorrectly formatted (invalid chord).
 class FileError(Exception):
@@ -35,95 +76,181 @@ def checkFileName(name):
     return is_valid_filename(name) and name.upper() not in reserved
 
 
-## @brief   Gets a list of valid songs from the song directory.
-#  @return  A list of all valid songs.
-def getValidSongs():
-    # [:-4] removes ".txt" from filenames
-    return sorted([s[:-4] for s in listdir(Path("src/songs"))])
+## @brief The settings file, and the output file directory read from it (by getOutputDir).
+SETTINGS_FILE = Path("src/Settings.txt")
+outputDir = None
 
 
-## @brief         Gets a list of notes in the given key.
-#  @param[in] key The key of the song.
-#  @return        A list of notes in the given key.
-#  @throw         ParamError if the key isn't valid.
-def getNotes(key):
-    # Checks if key is valid
+## @brief   Gets the output file directory from the settings file, reading the file only once.
+#  @return  The path of the output file directory.
+def getOutputDir():
+    global outputDir
+    if outputDir is None:
+        with SETTINGS_FILE.open() as fp:
+            outputDir = Path(fp.readline().strip())
+    return outputDir
 
-    if key not in validKeys:
-        raise ParamError("The key \"" + key + "\" isn't recognized.")
 
-    if len(key) > 1:
-        if key[1] == "#":
-            notes = sharpNotes
-        elif key[1] == "b":
-            notes = flatNotes
-    elif key in ["C", "F"]:
-        notes = flatNotes
-    else:
-        notes = sharpNotes
+## @brief          Gets the pitch of a note.
+#  @param[in] note The name of the note (eg. "F#").
+#  @return         The number of semitones above C (from 0 to 11).
+def pitch(note):
+    return (naturals[note[0]] + note.count("#") - note.count("b")) % 12
+
 
-    # Gets notes of the major scale started at the given key
+## @brief            Spells a scale with one note on each letter.
+#  @param[in] tonic  The first note of the scale.
+#  @param[in] mode   The degree of the major scale the mode starts on (see modes).
+#  @return           A list of notes in the scale.
+def spellScale(tonic, mode):
+    steps = majorSteps[mode:] + majorSteps[:mode]
+    start = letters.index(tonic[0])
+    note = pitch(tonic)
 
     noteList = []
-    note = notes.index(key)
-    for i in list(range(7)):
-        noteList.append(notes[note])
-        if i == 2:
-            note += 1
-        else:
-            note += 2
+    for i in range(7):
+        letter = letters[(start + i) % 7]
+        # The accidental needed to reach the note from the natural note (from -2 to 2)
+        offset = (note - naturals[letter] + 6) % 12 - 6
+        noteList.append(letter + ("#" * offset if offset > 0 else "b" * -offset))
+        note = (note + steps[i]) % 12
 
     return noteList
 
 
+## @brief            Builds the scale of a key with correct enharmonic spelling.
+#  @details          If the scale would need double sharps or flats (eg. G# major), it is
+#                    spelled from the other name of the tonic instead (eg. Ab major).
+#  @param[in] tonic  The first note of the scale (one of tonics).
+#  @param[in] mode   The degree of the major scale the mode starts on (see modes).
+#  @return           A list of notes in the scale.
+def buildNotes(tonic, mode=0):
+    names = [tonic] + sorted(t for t in tonics if t != tonic and pitch(t) == pitch(tonic))
+    spellings = [spellScale(name, mode) for name in names]
+    return min(spellings, key=lambda notes: sum(len(n) > 2 for n in notes))
+
+
+## @brief         Splits a key into the name of its scale and the fret of its capo.
+#  @param[in] key The key (eg. "Bb", "F#m", "D dorian" or "Bb capo 3").
+#  @return        The name of the scale (a key in scales) and the fret of the capo (0 for none).
+#  @throw         ParamError if the key isn't valid.
+def parseKey(key):
+    m = keyPattern.fullmatch(key)
+    if m is None or m["scale"] not in scales or int(m["capo"] or 0) > MAX_CAPO:
+        raise ParamError("The key \"" + key + "\" isn't recognized.")
+    return m["scale"], int(m["capo"] or 0)
+
+
+## @brief         Checks if a key is valid.
+#  @param[in] key The key (see parseKey).
+#  @return        True if the key is valid and False otherwise.
+def checkKey(key):
+    try:
+        parseKey(key)
+        return True
+    except ParamError:
+        return False
+
+
+## @brief                Transposes the name of a scale.
+#  @details              When the new tonic has two names (eg. F# and Gb), the one whose scale
+#                        has fewer sharps and flats is used.
+#  @param[in] scale      The name of the scale (a key in scales).
+#  @param[in] semitones  The number of semitones to transpose up by (negative to transpose down).
+#  @return               The name of the transposed scale.
+def transposeKey(scale, semitones):
+    tonic = scale[:2] if scale[1:2] in {"#", "b"} else scale[:1]
+    suffix = scale[len(tonic):]
+    note = (pitch(tonic) + semitones) % 12
+    names = sorted(t + suffix for t in tonics if pitch(t) == note)
+    return min(names, key=lambda name: sum(len(n) - 1 for n in scales[name]))
+
+
+## @brief         Gets the key that chords are played in, which is lower than the key with a capo.
+#  @param[in] key The key (see parseKey).
+#  @return        The name of the scale that chords are played in.
+#  @throw         ParamError if the key isn't valid.
+def capoKey(key):
+    scale, capo = parseKey(key)
+    return transposeKey(scale, -capo) if capo else scale
+
+
+## @brief         Spells a key the way its chords are spelled (see buildNotes).
+#  @details       Keys whose scale is spelled from the other name of the tonic (eg. G#, which
+#                 is spelled as Ab) are renamed, so the key in a title agrees with its chords.
+#  @param[in] key The key (see parseKey).
+#  @return        The key, with the tonic its scale is spelled from.
+#  @throw         ParamError if the key isn't valid.
+def spellKey(key):
+    scale, capo = parseKey(key)
+    tonic = scale[:2] if scale[1:2] in {"#", "b"} else scale[:1]
+    return scales[scale][0] + scale[len(tonic):] + (f" capo {capo}" if capo else "")
+
+
+## @brief             Checks if a variant is valid.
+#  @param[in] variant The variant (see variantPattern).
+#  @return            True if the variant is valid and False otherwise.
+def checkVariant(variant):
+    m = variantPattern.fullmatch(variant)
+    return m is not None and int(m["capo"] or 0) <= MAX_CAPO and abs(int(m["semitones"] or 0)) < 12
+
+
+## @brief             Gets the key of a song in a variant of its setlist.
+#  @param[in] key     The key of the song (see parseKey).
+#  @param[in] variant The variant (see variantPattern).
+#  @return            The key of the song in the variant.
+#  @throw             ParamError if the key or the variant isn't valid.
+def variantKey(key, variant):
+    scale, capo = parseKey(key)
+    if not checkVariant(variant):
+        raise ParamError("The variant \"" + variant + "\" isn't recognized.")
+
+    m = variantPattern.fullmatch(variant)
+    if m["capo"]:
+        capo = int(m["capo"])
+    elif m["semitones"]:
+        scale = transposeKey(scale, int(m["semitones"]))
+    return scale + (f" capo {capo}" if capo else "")
+
+
+## @brief         Gets a list of notes in the given key.
+#  @details       With a capo, these are the notes the chords are played in (see capoKey).
+#  @param[in] key The key of the song.
+#  @return        A tuple of notes in the given key.
+#  @throw         ParamError if the key isn't valid.
+def getNotes(key):
+    notes = keyNotes.get(key)
+    if notes is None:
+        notes = keyNotes[key] = scales[capoKey(key)]
+    return notes
+
+
+## @brief       Splits a token into its parts (see tokenPattern).
+#  @param[in] c The token after the section name in a song file.
+#  @return      The match of the token, or None if it isn't valid.
+def matchToken(c):
+    return tokenPattern.fullmatch(c)
+
+
 ## @brief       Checks if a "chord" is valid.
 #  @param[in] c The "chord" to be checked.
 #  @return      True if the "chord" is valid and False otherwise.
 def checkValidChord(c):
-    if c in {"|", "new", "same"}:
-        return True
-    elif c[0] == "x":
-        return len(c) > 1 and c[1:].isdecimal()
-    elif c[0] == "(":
-        return checkValidChord(c[1:])
-    elif c[-1] == ")":
-        return checkValidChord(c[:-1])
-    elif c.count("/") == 1:
-        c = c.split("/")
-        return checkValidChord(c[0]) and checkValidChord(c[1])
-    elif c.endswith("sus"):
-        # Suspended chords aren't minor
-        return checkValidChord(c[:-3]) and c.isupper()
-    else:
-        return c.lower() in numList and (c.islower() or c.isupper())
-
-
-## @brief              Gets chord from Roman numeral based on list of notes.
-#  @param[in] noteList A list of notes in the key of the song.
-#  @param[in] chord    The chord from the song file (represented as a Roman numeral).
-#  @param[in] fileName The name of file with student information.
-#  @return             The chord converted from the Roman numeral.
-#  @throw              FileError if the chord isn't valid.
-def getChord(noteList, chord, fileName):
-    if chord.count("/") == 1:
-        chord = chord.split("/")
-        chord = f"{getChord(noteList, chord[0], fileName)}/" + \
-                f"{getChord(noteList, chord[1].upper(), fileName)}"
-
-    elif chord.endswith("sus"):
-        # Checks if suspended chord is minor, and retrieves it from list if it is NOT
-        if not chord[:-3].isupper():
-            raise FileError(f"Suspended chords aren't minor (see \"{chord}\").")
-        chord = f"{getChord(noteList, chord[:-3], fileName)}sus"
-
-    else:
-        # Checks if chord is valid, and retrieves it from list if it is
-        if chord.lower() not in numList:
-            raise FileError(f"The chord \"{chord}\" in {fileName} isn't recognized.")
-        # Ternary statement handles if chord is minor
-        chord = noteList[numList.index(chord.lower())] + ("m" if chord.islower() else "")
-
-    return chord
+    return tokenPattern.fullmatch(c) is not None
+
+
+## @brief          Reads the number of processes to use from the command line.
+#  @param[in] text The number entered (0 for one per CPU).
+#  @return         The number of processes.
+#  @throw          ArgumentTypeError if the number isn't a whole number of at least 0.
+def jobCount(text):
+    try:
+        jobs = int(text)
+    except ValueError:
+        jobs = -1
+    if jobs < 0:
+        raise ArgumentTypeError(f"\"{text}\" isn't a number of processes (0 or more, where 0 means one per CPU).")
+    return jobs
 
 
 ## @brief       Removes extraneous spaces from a string
@@ -131,3 +258,11 @@ def getChord(noteList, chord, fileName):
 #  @return      The input string with only one space between each "word"
 def reduceWhitespace(s):
     return " ".join([x.strip() for x in s.strip().split() if x.strip()])
+
+
+# Precomputes the scale of every key and mode once at import
+
+scales = {tonic + suffix: tuple(buildNotes(tonic, mode)) for tonic in tonics for suffix, mode in modes.items()}
+
+## @brief The notes of each key looked up so far (see getNotes), including keys with a capo.
+keyNotes = {}
@@ -0,0 +1,205 @@
+## @file   Index.py
+#  @brief  Contains the persistent index of compiled song files.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import os
+import pickle
+
+from hashlib import sha1
+from pathlib import Path
+from threading import Lock
+
+from Helpers import FileError
+from Songs import SONG_DIR, Song, readLines, songCache
+from Stats import stats, timed
+
+INDEX_FILE = Path("src/songs.idx")
+
+## @brief Changes whenever the format of the index (or of Song) changes.
+INDEX_VERSION = 3
+
+
+## @brief   An index of every song file with its compiled lines and validity, saved to disk.
+#  @details Each entry is (modification time and size, content hash, song, error), where
+#           error is the reason the song is invalid or None. The song (and the hash) of a
+#           file that can't be read is None. Only files whose modification
+#           time or size changed are re-read, and only files whose content changed are
+#           recompiled.
+class SongIndex:
+    ## @brief          Loads the index from disk (if it exists).
+    #  @param[in] path The folder with the song files.
+    #  @param[in] file The file the index is saved to.
+    def __init__(self, path=SONG_DIR, file=INDEX_FILE):
+        self.path = Path(path)
+        self.file = Path(file)
+        self.entries = {}
+        self.lock = Lock()
+        self.load()
+
+    ## @brief Reads the index from disk, leaving it empty if it can't be read.
+    def load(self):
+        try:
+            with self.file.open("rb") as fp:
+                version, entries = pickle.load(fp)
+            if version == INDEX_VERSION:
+                self.entries = entries
+        except Exception:
+            # A missing, outdated or corrupt index is rebuilt by update()
+            self.entries = {}
+
+    ## @brief   Writes the index to disk, replacing the old file only once it is complete.
+    #  @details Called with the lock held. Each process writes its own temporary file, so
+    #           processes saving at the same time don't write to the same file.
+    def save(self):
+        temp = self.file.with_name(f"{self.file.name}.{os.getpid()}.tmp")
+        with temp.open("wb") as fp:
+            pickle.dump((INDEX_VERSION, self.entries), fp, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, self.file)
+
+    ## @brief  Brings the index up to date with the song folder, saving it if it changed.
+    #  @return A set of the names of the songs that were added, removed or changed.
+    def update(self):
+        with self.lock:
+            entries = {}
+            changed = set()
+
+            with os.scandir(self.path) as files:
+                for file in files:
+                    if not file.name.endswith(".txt") or not file.is_file():
+                        continue
+                    name = file.name[:-4]
+                    try:
+                        entries[name] = self.refresh(name, file.path, file.stat())
+                    except OSError:
+                        # The file was removed after the folder was read
+                        continue
+                    if entries[name] is not self.entries.get(name):
+                        changed.add(name)
+
+            changed |= self.entries.keys() - entries.keys()
+            self.entries = entries
+
+            if changed:
+                self.save()
+        return changed
+
+    ## @brief           Brings the entries of some songs up to date, saving the index if any changed.
+    #  @details         Only the files of the songs are read, so this is used when the songs that
+    #                   changed are already known (see Library.py).
+    #  @param[in] names The names of the songs that may have been added, removed or changed.
+    #  @return          A set of the names of the songs that were added, removed or changed.
+    def updateSongs(self, names):
+        with self.lock:
+            # Entries are replaced rather than changed so they can be read while they are updated
+            entries = dict(self.entries)
+            changed = set()
+
+            for name in names:
+                path = self.path / f"{name}.txt"
+                try:
+                    entry = self.refresh(name, path, path.stat()) if path.is_file() else None
+                except OSError:
+                    # The file was removed while it was being read
+                    entry = None
+
+                if entry is None:
+                    if entries.pop(name, None) is not None:
+                        changed.add(name)
+                elif entry is not entries.get(name):
+                    entries[name] = entry
+                    changed.add(name)
+
+            self.entries = entries
+
+            if changed:
+                self.save()
+        return changed
+
+    ## @brief          Gets the up to date entry of a song file.
+    #  @param[in] name The name of the song.
+    #  @param[in] path The path of the song file.
+    #  @param[in] stat The status of the song file.
+    #  @return         The old entry if the file didn't change, or a new entry otherwise.
+    def refresh(self, name, path, stat):
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        old = self.entries.get(name)
+        if old and old[0] == stamp:
+            return old
+
+        try:
+            with stats.timer("read"), open(path, "rb") as fp:
+                data = fp.read()
+        except OSError as e:
+            return (stamp, None, None, f"{name}.txt can't be read ({e.strerror}).")
+        digest = sha1(data).hexdigest()
+
+        if old and old[1] == digest:
+            return (stamp,) + old[1:]
+        return (stamp, digest) + compileSong(name, data)
+
+    ## @brief  Gets the names of every song in the index.
+    #  @return A sorted list of song names.
+    def names(self):
+        return sorted(self.entries)
+
+    ## @brief          Gets the title of a song.
+    #  @param[in] name The name of the song.
+    #  @return         The title, or an empty string if the song file can't be read.
+    def title(self, name):
+        song = self.entries[name][2]
+        return song.title if song else ""
+
+    ## @brief          Gets the reason a song is invalid.
+    #  @param[in] name The name of the song.
+    #  @return         The error message, or None if the song is valid.
+    def error(self, name):
+        return self.entries[name][3]
+
+    ## @brief          Gets the hash of the contents of a song file.
+    #  @param[in] name The name of the song.
+    #  @return         The hash as a string of hexadecimal digits.
+    def digest(self, name):
+        return self.entries[name][1]
+
+    ## @brief           Gets an indexed song if the file hasn't changed since it was indexed.
+    #  @param[in] name  The name of the song.
+    #  @param[in] stamp The current modification time and size of the file.
+    #  @return          The song, or None if it isn't indexed or is out of date.
+    def lookup(self, name, stamp):
+        entry = self.entries.get(name)
+        if entry and entry[0] == stamp:
+            return entry[2]
+
+
+## @brief          Parses and compiles a song file.
+#  @param[in] name The name of the song.
+#  @param[in] data The bytes of the song file.
+#  @return         The song (or None if the file can't be decoded) and the reason it is invalid (or None).
+@timed("parse")
+def compileSong(name, data):
+    try:
+        song = Song(name, readLines(data))
+    except UnicodeDecodeError as e:
+        return None, f"{name}.txt can't be read ({e.reason})."
+    try:
+        song.ir
+    except FileError as e:
+        return song, str(e)
+    return song, None
+
+
+## @brief The song index shared by the program (loaded by getSongIndex).
+songIndex = None
+
+
+## @brief  Gets the shared song index, loading it and bringing it up to date.
+#  @details The index is also used by the shared song cache to avoid reading song files.
+#  @return The song index.
+def getSongIndex():
+    global songIndex
+    if songIndex is None:
+        songIndex = SongIndex()
+        songCache.index = songIndex
+    songIndex.update()
+    return songIndex
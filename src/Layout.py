@@ -0,0 +1,183 @@
+## @file   Layout.py
+#  @brief  Measures the height of songs and decides which page each song goes on.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import re
+
+from Compiler import realize
+from Fonts import LINE_HEIGHT, textWidth
+from Helpers import spellKey
+from Stats import timed
+
+## @brief Sizes (in points) and distances (in inches) of the chart, shared by Document.py and Pdf.py.
+FONT = "Calibri"
+FONT_SIZE = 28
+TITLE_SIZE = 36
+KEY_SIZE = 20
+SMALL_SIZE = 22
+LINE_SPACING = 36
+SONG_SPACING = 10
+MARGIN = 1
+TAB_STOP = 1.58
+
+## @brief The size of a letter page and its top and bottom margins, in points.
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+PAGE_MARGIN = 72
+
+## @brief The space for text on a page, in points.
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN * 72
+TEXT_HEIGHT = PAGE_HEIGHT - 2 * PAGE_MARGIN
+
+## @brief The distance between Word's default tab stops, in points.
+DEFAULT_TAB = 36
+
+## @brief Word's default line spacing (as a multiple of single spacing).
+AUTO_SPACING = 1.15
+
+## @brief The height of a title line, in points.
+TITLE_HEIGHT = TITLE_SIZE * LINE_HEIGHT * AUTO_SPACING
+
+
+## @brief       Gets the position of the tab stop after a position in a line.
+#  @param[in] x The distance from the left margin, in points.
+#  @return      The distance from the left margin to the next tab stop.
+def nextTab(x):
+    if x < TAB_STOP * 72:
+        return TAB_STOP * 72
+    return (x // DEFAULT_TAB + 1) * DEFAULT_TAB
+
+
+## @brief              Splits a realized line into lines that fit within the margins.
+#  @param[in] segments The realized line (see Compiler.realizeLine).
+#  @param[in] width    The width available for the line, in points.
+#  @return             A list of lines, each a list of (x, text, size) for the text on it.
+def layoutLine(segments, width=TEXT_WIDTH):
+    lines = [[]]
+    x = 0
+
+    for text, small in segments:
+        size = SMALL_SIZE if small else FONT_SIZE
+        for piece in re.split(r"([\t\n])", text):
+            if piece == "\n":
+                lines.append([])
+                x = 0
+            elif piece == "\t":
+                x = nextTab(x)
+            elif piece:
+                w = textWidth(piece, size)
+                # Wraps text that goes past the margin (like Word, spaces can go past it)
+                if x + w > width and x > 0 and piece.strip():
+                    lines.append([])
+                    x = 0
+                if piece.strip():
+                    lines[-1].append((x, piece, size))
+                x += w
+
+    return lines
+
+
+## @brief           Splits a title into centred lines that fit within the margins.
+#  @details         Like Word, lines are broken between words, and the spaces at the end of a line
+#                   aren't counted when the line is centred.
+#  @param[in] title The title of the song.
+#  @param[in] key   The key of the song.
+#  @param[in] width The width available for the title, in points.
+#  @return          A list of lines, each a list of (x, text, size) for the text on it.
+def layoutTitle(title, key, width=TEXT_WIDTH):
+    lines = [[]]
+    x = 0
+
+    for text, size in ((title.strip() + " ", TITLE_SIZE), (f"({spellKey(key)})", KEY_SIZE)):
+        for word in re.findall(r"\S+\s*", text):
+            if x + textWidth(word.rstrip(), size) > width and x > 0:
+                lines.append([])
+                x = 0
+            lines[-1].append((x, word, size))
+            x += textWidth(word, size)
+
+    centred = []
+    for line in lines:
+        *rest, (x, word, size) = line
+        line = rest + [(x, word.rstrip(), size)]
+        offset = (width - x - textWidth(word.rstrip(), size)) / 2
+        centred.append([(x + offset, text, size) for x, text, size in line])
+    return centred
+
+
+## @brief           Gets the number of lines a title takes up.
+#  @param[in] title The title of the song.
+#  @param[in] key   The key of the song.
+#  @return          The number of lines.
+def titleLines(title, key):
+    return len(layoutTitle(title, key))
+
+
+## @brief              Gets the height of a song from the number of lines it takes up.
+#  @param[in] title    The title of the song.
+#  @param[in] key      The key of the song.
+#  @param[in] numLines The number of lines the song takes up after its title (see layoutLine).
+#  @return             The height of the song in points, including the space after it.
+def linesHeight(title, key, numLines):
+    return titleLines(title, key) * TITLE_HEIGHT + numLines * LINE_SPACING + SONG_SPACING
+
+
+## @brief           Measures the height of a song as written by Document.placeSong.
+#  @param[in] song  The parsed song (see Songs.Song).
+#  @param[in] key   The key of the song.
+#  @param[in] lines The realized lines of the song (realized from song and key if not given).
+#  @return          The height of the song in points, including the space after it.
+@timed("layout")
+def songHeight(song, key, lines=None):
+    if lines is None:
+        lines = realize(song.ir, key)
+    return linesHeight(song.title, key, sum(len(layoutLine(line)) for line in lines))
+
+
+## @brief                Decides if a song should start on a new page so it isn't cut off.
+#  @param[in] pageHeight The height already used on the current page, in points.
+#  @param[in] height     The height of the song (see songHeight).
+#  @return               True if a page break is needed and the updated used height.
+def pageBreak(pageHeight, height):
+    # The space after the last song on a page can go past the bottom margin
+    if pageHeight and pageHeight + height - SONG_SPACING > TEXT_HEIGHT:
+        return True, height
+    return False, pageHeight + height
+
+
+## @brief             Packs songs onto pages.
+#  @details           Without reordering, songs stay in order and each song starts a new page
+#                     when it doesn't fit on the current one. With reordering, songs are
+#                     packed tallest first onto the first page they fit on (first fit
+#                     decreasing), which minimizes the number of pages in practice; songs
+#                     keep their original order within each page, and pages are ordered by
+#                     their first song.
+#  @param[in] heights The height of each song (see songHeight).
+#  @param[in] reorder True if songs can be reordered and False otherwise.
+#  @return            A list of pages, each a list of indices of songs.
+@timed("layout")
+def paginate(heights, reorder=False):
+    if not reorder:
+        pages = []
+        pageHeight = 0
+        for i, height in enumerate(heights):
+            newPage, pageHeight = pageBreak(pageHeight, height)
+            if newPage or not pages:
+                pages.append([])
+            pages[-1].append(i)
+        return pages
+
+    pages, used = [], []
+    for i in sorted(range(len(heights)), key=lambda i: -heights[i]):
+        for p in range(len(pages)):
+            newPage, pageHeight = pageBreak(used[p], heights[i])
+            if not newPage:
+                pages[p].append(i)
+                used[p] = pageHeight
+                break
+        else:
+            pages.append([i])
+            used.append(heights[i])
+
+    return sorted(sorted(page) for page in pages)
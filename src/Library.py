@@ -0,0 +1,157 @@
+## @file   Library.py
+#  @brief  Contains the song library, which keeps the song index and search index current as song files change.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+
+from Index import getSongIndex
+from Search import SEARCH_LIMIT, SearchIndex
+from Songs import songCache
+
+## @brief The number of seconds between checks of the song folder when changes can't be watched.
+POLL_INTERVAL = 1.0
+
+## @brief The number of seconds to wait for more changes before applying them, so saving a file
+#         (which can cause several changes) only updates the library once.
+SETTLE_TIME = 0.1
+
+
+## @brief             Starts watching the song folder for changes with watchdog (if it is installed).
+#  @details           watchdog uses the change notifications of the operating system (eg. inotify on
+#                     Linux and ReadDirectoryChangesW on Windows).
+#  @param[in] path    The song folder.
+#  @param[in] changes The queue to put the name of each song that changes in.
+#  @return            The observer watching the folder, or None if watchdog isn't installed.
+def watchFolder(path, changes):
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    ## @brief Puts the name of the song of each changed file in the queue.
+    class SongHandler(FileSystemEventHandler):
+        ## @brief           Handles a change in the song folder.
+        #  @param[in] event The change.
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            # Moving a file changes both its old and new names
+            for file in (event.src_path, getattr(event, "dest_path", "")):
+                if str(file).endswith(".txt"):
+                    changes.put(Path(str(file)).stem)
+
+    observer = Observer()
+    observer.schedule(SongHandler(), str(path))
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+## @brief   The songs in the song folder, kept current while the program runs.
+#  @details The song folder is read once, then only the songs that change are read again:
+#           changes are found with watchFolder, or by checking the modification times of
+#           the song files every POLL_INTERVAL seconds if watchdog isn't installed. Each
+#           change updates the song index, the search index and the song cache.
+class Library:
+    ## @brief              Loads the songs and starts watching the song folder.
+    #  @param[in] index    The song index to keep current (see Index.SongIndex).
+    #  @param[in] interval The number of seconds between checks of the song folder when polling.
+    def __init__(self, index, interval=POLL_INTERVAL):
+        self.index = index
+        self.interval = interval
+        self.lock = Lock()
+        # Changes every time songs are added, removed or changed
+        self.version = 0
+        self.searchIndex = SearchIndex(index.entries, self.titles(index.entries))
+
+        self.changes = Queue()
+        self.stopped = Event()
+        self.observer = watchFolder(index.path, self.changes)
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    ## @brief           Gets the titles of songs in the index.
+    #  @param[in] names The names of the songs.
+    #  @return          A dictionary of titles by song name.
+    def titles(self, names):
+        entries = self.index.entries
+        return {name: entries[name][2].title if entries[name][2] else "" for name in names if name in entries}
+
+    ## @brief Applies changes to the song folder until the library is stopped.
+    def run(self):
+        while not self.stopped.is_set():
+            if self.observer is None:
+                self.stopped.wait(self.interval)
+                names = None
+            else:
+                names = {self.changes.get()}
+                try:
+                    # Waits for the rest of the changes from saving a file
+                    while True:
+                        names.add(self.changes.get(timeout=SETTLE_TIME))
+                except Empty:
+                    pass
+                names.discard(None)
+
+            # Keeps watching if the changes can't be applied (eg. the song folder can't be read)
+            try:
+                self.refresh(names)
+            except Exception as e:
+                print(f"Couldn't update the song library: {e}")
+
+    ## @brief           Updates the library with songs that may have changed.
+    #  @param[in] names The names of the songs, or None to check every song.
+    #  @return          A set of the names of the songs that were added, removed or changed.
+    def refresh(self, names=None):
+        changed = self.index.update() if names is None else self.index.updateSongs(names)
+        if changed:
+            titles = self.titles(changed)
+            with self.lock:
+                for name in changed:
+                    songCache.discard(name)
+                    if name in titles:
+                        self.searchIndex.add(name, titles[name])
+                    else:
+                        self.searchIndex.remove(name)
+                self.version += 1
+        return changed
+
+    ## @brief           Finds the songs best matching a query (see Search.SearchIndex.search).
+    #  @param[in] query The text entered.
+    #  @param[in] limit The maximum number of songs to return.
+    #  @return          A list of song names, best match first.
+    def search(self, query, limit=SEARCH_LIMIT):
+        with self.lock:
+            return self.searchIndex.search(query, limit)
+
+    ## @brief           Finds the song a query names exactly (see Search.SearchIndex.resolve).
+    #  @param[in] query The text entered.
+    #  @return          The name of the song, or None if no song has that name.
+    def resolve(self, query):
+        with self.lock:
+            return self.searchIndex.resolve(query)
+
+    ## @brief Stops watching the song folder.
+    def stop(self):
+        self.stopped.set()
+        self.changes.put(None)
+        if self.observer is not None:
+            self.observer.stop()
+        self.thread.join()
+
+
+## @brief The library shared by the program (started by getLibrary).
+library = None
+
+
+## @brief  Gets the shared library, loading it and starting to watch the song folder if needed.
+#  @return The library.
+def getLibrary():
+    global library
+    if library is None:
+        library = Library(getSongIndex())
+    return library
@@ -0,0 +1,179 @@
+## @file   Lint.py
+#  @brief  Checks every song file for errors, reporting each with its line and column.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import json
+import re
+import sys
+
+from argparse import ArgumentParser
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from Compiler import chordError
+from Helpers import jobCount, matchToken
+from Songs import SONG_DIR, readLines
+
+## @brief The number of files checked at a time by each process.
+CHUNK_SIZE = 64
+
+## @brief An error in a song file, with its line and column (counted from 1).
+Problem = namedtuple("Problem", ["file", "line", "column", "message"])
+
+
+## @brief          Splits a line into tokens with their columns.
+#  @param[in] line The line of the song file.
+#  @return         A list of (column, token) pairs.
+def tokenize(line):
+    return [(m.start() + 1, m.group()) for m in re.finditer(r"\S+", line)]
+
+
+## @brief            Finds the end of a section name (the token ending with a colon).
+#  @param[in] tokens The tokens of the line (see tokenize).
+#  @param[in] ind    The index of the first token of the section name.
+#  @return           The index after the section name, or None if it is missing a colon.
+def sectionEnd(tokens, ind):
+    for i in range(ind, len(tokens)):
+        if tokens[i][1][-1] == ":":
+            return i + 1
+    return None
+
+
+## @brief              Checks a line after the title of a song file, like Compiler.compileLine.
+#  @details            Unlike compileLine, every error in the line is found, and small text
+#                      must be closed on the line it is opened on.
+#  @param[in] fileName The name of the song file.
+#  @param[in] number   The line number.
+#  @param[in] line     The line of the song file.
+#  @return             A list of problems.
+def lintLine(fileName, number, line):
+    tokens = tokenize(line)
+    if not tokens:
+        return [Problem(fileName, number, 1, "The line is blank (each line needs a section name ending with a colon).")]
+
+    i = sectionEnd(tokens, 0)
+    if i is None:
+        section = " ".join(t for _, t in tokens)
+        return [Problem(fileName, number, 1, f"The section \"{section}\" is missing a colon.")]
+
+    problems = []
+    opened = None
+    while i < len(tokens):
+        column, c = tokens[i]
+        i += 1
+        m = matchToken(c)
+        kind = m.lastgroup if m else "chord"
+        if kind in {"bar", "new", "repeat"}:
+            continue
+        elif kind == "same":
+            end = sectionEnd(tokens, i)
+            if end is None:
+                section = " ".join(t for _, t in tokens[i:])
+                problems.append(Problem(fileName, number, column, f"The section \"{section}\" is missing a colon."))
+                break
+            i = end
+            continue
+
+        opens, closes = c[0] == "(", c[-1] == ")"
+        chord = c[1 if opens else 0:-1 if closes else None]
+        if not chord:
+            problems.append(Problem(fileName, number, column, "Parentheses must be attached to a chord."))
+            continue
+
+        if opens:
+            if opened is not None:
+                problems.append(Problem(fileName, number, column, "Small text is opened again before it is closed."))
+            opened = column
+        if closes:
+            if opened is None:
+                problems.append(Problem(fileName, number, column + len(c) - 1, "Small text is closed but not opened."))
+            opened = None
+
+        if m is None:
+            problems.append(Problem(fileName, number, column + opens, str(chordError(chord, fileName))))
+
+    if opened is not None:
+        problems.append(Problem(fileName, number, opened, "Small text isn't closed before the end of the line."))
+
+    return sorted(problems, key=lambda p: p.column)
+
+
+## @brief              Checks the contents of a song file.
+#  @param[in] fileName The name of the song file.
+#  @param[in] data     The bytes of the song file.
+#  @return             A list of problems.
+def lintSong(fileName, data):
+    try:
+        lines = readLines(data)
+    except UnicodeDecodeError as e:
+        return [Problem(fileName, 1, 1, f"The file can't be read ({e.reason}).")]
+
+    if not lines or not lines[0].strip():
+        return [Problem(fileName, 1, 1, "The song doesn't have a title.")]
+
+    problems = []
+    for number, line in enumerate(lines[1:], 2):
+        problems += lintLine(fileName, number, line)
+    return problems
+
+
+## @brief          Checks a song file.
+#  @param[in] path The path of the song file.
+#  @return         A list of problems.
+def lintFile(path):
+    try:
+        data = Path(path).read_bytes()
+    except OSError as e:
+        return [Problem(str(path), 1, 1, f"The file can't be read ({e.strerror}).")]
+    return lintSong(str(path), data)
+
+
+## @brief           Checks song files, in this process or in a process pool.
+#  @param[in] files The paths of the song files.
+#  @param[in] jobs  The number of processes to check with (0 for one per CPU).
+#  @return          A list of problems, in the order of the files.
+def lintFiles(files, jobs=0):
+    if jobs == 1 or len(files) <= CHUNK_SIZE:
+        results = map(lintFile, files)
+        return [problem for problems in results for problem in problems]
+
+    with ProcessPoolExecutor(jobs or None) as pool:
+        results = pool.map(lintFile, files, chunksize=CHUNK_SIZE)
+        return [problem for problems in results for problem in problems]
+
+
+## @brief          Gets the command line arguments for checking song files.
+#  @param[in] args The arguments to parse (defaults to the command line).
+#  @return         The parsed arguments.
+def parseArgs(args=None):
+    parser = ArgumentParser(description="Checks song files for errors.")
+    parser.add_argument("files", nargs="*", type=Path, help="the song files to check (defaults to every song)")
+    parser.add_argument("--json", action="store_true", help="print the errors as JSON")
+    parser.add_argument("-j", "--jobs", type=jobCount, default=0,
+                        help="the number of processes to check with (0 for one per CPU)")
+    return parser.parse_args(args)
+
+
+## @brief          Checks song files, printing every error.
+#  @param[in] args The command line arguments (defaults to sys.argv).
+#  @return         The exit code: 0 if there are no errors and 1 otherwise.
+def main(args=None):
+    args = parseArgs(args)
+    files = args.files or sorted(SONG_DIR.glob("*.txt"))
+    problems = lintFiles(files, args.jobs)
+
+    if args.json:
+        json.dump({"files": len(files), "errors": [p._asdict() for p in problems]}, sys.stdout, indent=4)
+        print()
+    else:
+        for p in problems:
+            print(f"{p.file}:{p.line}:{p.column}: {p.message}")
+        print(f"Checked {len(files)} songs, found {len(problems)} errors.")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+## @file   Pdf.py
+#  @brief  Contains functions for writing the chart directly to a .pdf file (without Word).
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import zlib
+
+from Compiler import realize
+from Fonts import BBOX, DESCENT, FIRST_CHAR, WIDTHS, textWidth
+from Layout import FONT, FONT_SIZE, LINE_SPACING, MARGIN, PAGE_HEIGHT, PAGE_MARGIN, PAGE_WIDTH, \
+    SONG_SPACING, TITLE_HEIGHT, TITLE_SIZE, layoutLine, layoutTitle, pageBreak, songHeight
+from Songs import getSong
+from Stats import timed
+
+
+## @brief   A .pdf document made of pages of text, filled from top to bottom.
+class PdfDocument:
+    ## @brief Creates a document with one empty page.
+    def __init__(self):
+        self.pages = []
+        self.newPage()
+
+    ## @brief Starts a new page.
+    def newPage(self):
+        self.pages.append([])
+        self.y = PAGE_MARGIN
+
+    ## @brief            Reserves space for a line, starting a new page if it doesn't fit.
+    #  @param[in] height The height of the line in points.
+    #  @return           The distance from the top of the page to the top of the line.
+    def addLine(self, height):
+        if self.y + height > PAGE_HEIGHT - PAGE_MARGIN and self.y > PAGE_MARGIN:
+            self.newPage()
+        top = self.y
+        self.y += height
+        return top
+
+    ## @brief            Adds space after a paragraph.
+    #  @param[in] height The height of the space in points.
+    def addSpace(self, height):
+        self.y += height
+
+    ## @brief               Draws text on the current page.
+    #  @param[in] x         The distance from the left of the page to the text.
+    #  @param[in] baseline  The distance from the top of the page to the baseline of the text.
+    #  @param[in] text      The text to draw.
+    #  @param[in] size      The font size in points.
+    #  @param[in] underline True if the text should be underlined and False otherwise.
+    def text(self, x, baseline, text, size, underline=False):
+        y = PAGE_HEIGHT - baseline
+        self.pages[-1].append(f"BT /F1 {size:g} Tf {x:.2f} {y:.2f} Td ({pdfString(text)}) Tj ET")
+        if underline:
+            self.pages[-1].append(f"{x:.2f} {y - size * 0.1:.2f} {textWidth(text, size):.2f} {size * 0.05:.2f} re f")
+
+    ## @brief          Saves the document.
+    #  @param[in] path The filename of the .pdf file.
+    @timed("pdf")
+    def save(self, path):
+        fontWidths = " ".join(map(str, WIDTHS))
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # The page tree is added once the pages are numbered
+            (f"<< /Type /Font /Subtype /TrueType /BaseFont /{FONT} " +
+             f"/FirstChar {FIRST_CHAR} /LastChar {FIRST_CHAR + len(WIDTHS) - 1} /Widths [{fontWidths}] " +
+             "/Encoding /WinAnsiEncoding /FontDescriptor 4 0 R >>").encode(),
+            (f"<< /Type /FontDescriptor /FontName /{FONT} /Flags 32 /FontBBox [{' '.join(map(str, BBOX))}] " +
+             "/ItalicAngle 0 /Ascent 750 /Descent -250 /CapHeight 644 /StemV 80 >>").encode(),
+        ]
+
+        kids = []
+        for page in self.pages:
+            content = zlib.compress("\n".join(page).encode())
+            objects.append(f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() +
+                           content + b"\nendstream")
+            objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] " +
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>").encode())
+            kids.append(f"{len(objects)} 0 R")
+        objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+        with open(path, "wb") as fp:
+            fp.write(b"%PDF-1.4\n")
+            offsets = []
+            for i, obj in enumerate(objects):
+                offsets.append(fp.tell())
+                fp.write(f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n")
+
+            xref = fp.tell()
+            fp.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+            for offset in offsets:
+                fp.write(f"{offset:010} 00000 n \n".encode())
+            fp.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+## @brief          Encodes text as the contents of a .pdf string.
+#  @param[in] text The text to encode.
+#  @return         The text in the font's encoding, with special characters escaped.
+def pdfString(text):
+    chars = []
+    for b in text.encode("cp1252", "replace"):
+        if chr(b) in "\\()":
+            chars.append("\\" + chr(b))
+        elif 32 <= b < 127:
+            chars.append(chr(b))
+        else:
+            chars.append(f"\\{b:03o}")
+    return "".join(chars)
+
+
+## @brief  Sets up an empty document.
+#  @return The document.
+def pdfSetup():
+    return PdfDocument()
+
+
+## @brief                Writes a song to pdf.
+#  @param[in] pdf        The document being generated.
+#  @param[in] pageHeight The height already used on the current page, in points.
+#  @param[in] fileName   The name of the song file.
+#  @param[in] key        The key of the song.
+#  @return               The document (pdf) and the updated used height (pageHeight).
+def writeSong(pdf, pageHeight, fileName, key):
+    return renderSong(pdf, pageHeight, getSong(fileName), key)
+
+
+## @brief                Writes a parsed song to pdf, with the same layout as Document.renderSong.
+#  @param[in] pdf        The document being generated.
+#  @param[in] pageHeight The height already used on the current page, in points.
+#  @param[in] song       The parsed song (see Songs.Song).
+#  @param[in] key        The key of the song.
+#  @return               The document (pdf) and the updated used height (pageHeight).
+def renderSong(pdf, pageHeight, song, key):
+    lines = realize(song.ir, key)
+    newPage, pageHeight = pageBreak(pageHeight, songHeight(song, key, lines))
+    return placeSong(pdf, song, key, newPage, lines), pageHeight
+
+
+## @brief             Writes a parsed song to pdf.
+#  @param[in] pdf     The document being generated.
+#  @param[in] song    The parsed song (see Songs.Song).
+#  @param[in] key     The key of the song.
+#  @param[in] newPage True if the song starts a new page and False otherwise.
+#  @param[in] lines   The realized lines of the song (realized from song and key if not given).
+#  @return            The document.
+@timed("pdf")
+def placeSong(pdf, song, key, newPage, lines=None):
+    if lines is None:
+        lines = realize(song.ir, key)
+
+    if newPage:
+        pdf.newPage()
+
+    pdf = writeTitle(pdf, song.title, key)
+    for i, line in enumerate(lines):
+        pdf = writeLine(pdf, line, i == len(lines) - 1)
+
+    return pdf
+
+
+## @brief            Writes a song title to the document.
+#  @param[in] pdf    The document to write to.
+#  @param[in] title  The title to write to the document.
+#  @param[in] key    The key of the song.
+#  @return           The document.
+def writeTitle(pdf, title, key):
+    left = MARGIN * 72
+    for line in layoutTitle(title, key):
+        baseline = pdf.addLine(TITLE_HEIGHT) + TITLE_HEIGHT - TITLE_SIZE * DESCENT
+        for x, text, size in line:
+            pdf.text(left + x, baseline, text, size, True)
+
+    return pdf
+
+
+## @brief              Writes a line to the document.
+#  @param[in] pdf      The document to write to.
+#  @param[in] segments The realized line to write (see Compiler.realizeLine).
+#  @param[in] end      True if line is the last line in the song and False otherwise.
+#  @return             The document.
+def writeLine(pdf, segments, end):
+    left = MARGIN * 72
+    for line in layoutLine(segments):
+        baseline = pdf.addLine(LINE_SPACING) + LINE_SPACING - FONT_SIZE * DESCENT
+        for x, text, size in line:
+            pdf.text(left + x, baseline, text, size)
+
+    if end:
+        pdf.addSpace(SONG_SPACING)
+
+    return pdf
+
+
+## @brief           Writes songs directly to a .pdf file.
+#  @param[in] songs The names of the song files.
+#  @param[in] keys  The keys of the songs.
+#  @param[in] path  The filename of the .pdf file.
+#  @return          True if the file was saved and False otherwise.
+def pdfSave(songs, keys, path):
+    pdf = pdfSetup()
+    pageHeight = 0
+    for song, key in zip(songs, keys):
+        pdf, pageHeight = writeSong(pdf, pageHeight, song, key)
+
+    try:
+        pdf.save(path)
+        return True
+    except OSError:
+        return False
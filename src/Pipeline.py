@@ -0,0 +1,130 @@
+## @file   Pipeline.py
+#  @brief  Writes charts with asyncio, reading songs and saving charts while other charts are rendered.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import asyncio
+
+from Songs import getSong
+from Stats import stats
+
+## @brief The most song files read at once.
+PREFETCH = 8
+
+## @brief The most rendered charts waiting to be saved, so rendering can't get far ahead of saving
+#         (eg. to a slow network share) and keep every chart in memory.
+QUEUE_SIZE = 2
+
+
+## @brief              Runs a function on a thread of the event loop, profiling it if profiling is on.
+#  @param[in] function The function.
+#  @param[in] args     The arguments of the function.
+#  @return             The result of the function.
+async def inThread(function, *args):
+    def run():
+        with stats.profiled():
+            return function(*args)
+    return await asyncio.to_thread(run)
+
+
+## @brief           Starts reading songs, at most PREFETCH at a time.
+#  @param[in] names The names of the songs, in the order they are needed.
+#  @param[in] limit The most songs read at once.
+#  @return          A dictionary of tasks by song name, each of which gets its parsed song.
+def prefetch(names, limit=PREFETCH):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def read(name):
+        async with semaphore:
+            return await asyncio.to_thread(getSong, name)
+
+    return {name: asyncio.ensure_future(read(name)) for name in dict.fromkeys(names)}
+
+
+## @brief           Reads songs, several at a time.
+#  @param[in] names The names of the songs.
+#  @return          A dictionary of parsed songs by name.
+def readSongs(names):
+    async def readAll():
+        tasks = prefetch(names)
+        return {name: await task for name, task in tasks.items()}
+    return asyncio.run(readAll())
+
+
+## @brief              Writes setlists, overlapping reading, rendering and saving.
+#  @details            Every song is read ahead (see prefetch). Setlists are rendered one at a time,
+#                      each as soon as its songs are read, then put in a queue of at most QUEUE_SIZE
+#                      charts that are saved one at a time, so the next setlist is rendered while the
+#                      last is saved (and converted to .pdf). A setlist that fails to be read, rendered
+#                      or saved doesn't stop the others.
+#  @param[in] setlists A list of setlist names and their lists of (song, key) pairs.
+#  @param[in] render   A function of (name, setlist, dictionary of parsed songs by name) that renders a setlist.
+#  @param[in] save     A function that saves what render returns and returns the result of the setlist.
+#  @param[in] failed   A function of (name, exception) that gets the result of a setlist that failed.
+#  @param[in] results  A future for the result of each setlist, set once it is saved or fails.
+async def pipeline(setlists, render, save, failed, results):
+    reads = prefetch(song for _, setlist in setlists for song, _ in setlist)
+    queue = asyncio.Queue(QUEUE_SIZE)
+
+    async def saveAll():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            i, rendered = item
+            try:
+                result = await inThread(save, rendered)
+            except Exception as e:
+                result = failed(setlists[i][0], e)
+            results[i].set_result(result)
+
+    saver = asyncio.ensure_future(saveAll())
+    try:
+        for i, (name, setlist) in enumerate(setlists):
+            try:
+                songs = {song: await reads[song] for song, _ in setlist}
+                rendered = await inThread(render, name, setlist, songs)
+            except Exception as e:
+                results[i].set_result(failed(name, e))
+                continue
+
+            # Waits for the saver if it is behind, unless it stopped
+            put = asyncio.ensure_future(queue.put((i, rendered)))
+            await asyncio.wait([put, saver], return_when=asyncio.FIRST_COMPLETED)
+            if saver.done():
+                put.cancel()
+                break
+        if not saver.done():
+            await queue.put(None)
+        await saver
+    finally:
+        tasks = list(reads.values()) + [saver]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+## @brief              Writes setlists, overlapping reading, rendering and saving (see pipeline).
+#  @param[in] setlists A list of setlist names and their lists of (song, key) pairs.
+#  @param[in] render   A function of (name, setlist, dictionary of parsed songs by name) that renders a setlist.
+#  @param[in] save     A function that saves what render returns and returns the result of the setlist.
+#  @param[in] failed   A function of (name, exception) that gets the result of a setlist that failed.
+#  @return             A generator of the result of each setlist, in order, as soon as it is saved or fails.
+def runPipeline(setlists, render, save, failed):
+    loop = asyncio.new_event_loop()
+    try:
+        results = [loop.create_future() for _ in setlists]
+        task = loop.create_task(pipeline(setlists, render, save, failed, results))
+        for result in results:
+            # Stops waiting if the pipeline itself stopped before the setlist was done
+            loop.run_until_complete(asyncio.wait([result, task], return_when=asyncio.FIRST_COMPLETED))
+            if not result.done():
+                task.result()
+            yield result.result()
+        loop.run_until_complete(task)
+    finally:
+        if not task.done():
+            task.cancel()
+            loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
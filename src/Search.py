@@ -0,0 +1,226 @@
+## @file   Search.py
+#  @brief  Contains the in-memory search index of song names used to pick songs.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import re
+import sys
+
+from bisect import bisect_left, insort
+from collections import Counter
+
+from Index import getSongIndex
+
+## @brief The number of results to return by default.
+SEARCH_LIMIT = 10
+
+## @brief The least fraction of the trigrams of a query that a song must share with it to match.
+MIN_OVERLAP = 0.5
+
+
+## @brief          Normalizes text for searching by lowering its case and removing punctuation.
+#  @param[in] text The text to normalize.
+#  @return         The words of the text, in lower case and separated by one space.
+def normalize(text):
+    return " ".join(re.findall(r"[a-z0-9]+", re.sub(r"['’]", "", text.lower())))
+
+
+## @brief          Gets the trigrams (every three characters) of normalized text.
+#  @details        Words are padded with spaces so the start of each word has its own trigrams.
+#  @param[in] text The normalized text.
+#  @return         A set of trigrams.
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+## @brief   An index of song names (and titles) that finds songs from part of their name.
+#  @details Each song is found by its normalized name and by its title (the first line of the
+#           song file) if it is different. Queries are matched as a prefix of the name or of any
+#           word (through a sorted list of words), and as misspelled or partial names (through
+#           the trigrams each name shares with the query). Results are ranked by an exact match,
+#           then a prefix match, then a word prefix match, then by the trigrams shared.
+class SearchIndex:
+    ## @brief           Builds the index.
+    #  @param[in] names The names of the songs.
+    #  @param[in] texts A dictionary of other text to find each song by (eg. its title).
+    def __init__(self, names, texts=None):
+        # The name and normalized names of each song by its number (None once it is removed)
+        self.names = []
+        self.keys = []
+        self.ids = {}
+        # The songs with each trigram and with each normalized name
+        self.grams = {}
+        self.exact = {}
+        # The results of recent queries
+        self.results = {}
+
+        texts = texts or {}
+        self.sorted = sorted(names)
+        # Every normalized word and whole name, with the number of its song
+        self.words = sorted(word for name in self.sorted for word in self.insert(name, texts.get(name, "")))
+
+    ## @brief          Adds a song to every table except the sorted lists.
+    #  @param[in] name The name of the song.
+    #  @param[in] text Other text to find the song by.
+    #  @return         A list of (word, number of the song) to add to the sorted list of words.
+    def insert(self, name, text):
+        i = len(self.names)
+        keys = [normalize(name)]
+        text = normalize(text)
+        if text and text != keys[0]:
+            keys.append(text)
+
+        self.names.append(name)
+        self.keys.append(keys)
+        self.ids[name] = i
+        self.exact.setdefault(keys[0], []).append(name)
+        # A trigram of both the name and the title is only counted once
+        for gram in set().union(*map(trigrams, keys)):
+            self.grams.setdefault(gram, []).append(i)
+
+        return [(word, i) for key in keys for word in [key] + key.split(" ")[1:]]
+
+    ## @brief          Adds a song, replacing it if it is already in the index.
+    #  @param[in] name The name of the song.
+    #  @param[in] text Other text to find the song by (eg. its title).
+    def add(self, name, text=""):
+        self.remove(name)
+        for word in self.insert(name, text):
+            insort(self.words, word)
+        insort(self.sorted, name)
+        self.results.clear()
+
+    ## @brief          Removes a song (if it is in the index).
+    #  @param[in] name The name of the song.
+    def remove(self, name):
+        i = self.ids.pop(name, None)
+        if i is None:
+            return
+
+        keys = self.keys[i]
+        for word in [(word, i) for key in keys for word in [key] + key.split(" ")[1:]]:
+            del self.words[bisect_left(self.words, word)]
+        for gram in set().union(*map(trigrams, keys)):
+            self.grams[gram].remove(i)
+        self.exact[keys[0]].remove(name)
+        del self.sorted[bisect_left(self.sorted, name)]
+
+        self.names[i], self.keys[i] = None, []
+        self.results.clear()
+
+    ## @brief            Finds the songs that start with a prefix, or have a word that does.
+    #  @param[in] prefix The normalized prefix.
+    #  @return           A set of the indices of the songs.
+    def prefixed(self, prefix):
+        found = set()
+        i = bisect_left(self.words, (prefix,))
+        while i < len(self.words) and self.words[i][0].startswith(prefix):
+            found.add(self.words[i][1])
+            i += 1
+        return found
+
+    ## @brief           Ranks a song for a query.
+    #  @param[in] i     The index of the song.
+    #  @param[in] query The normalized query.
+    #  @param[in] share The fraction of the trigrams of the query the song has.
+    #  @return          A tuple that sorts before the tuples of worse matches.
+    def rank(self, i, query, share):
+        keys = self.keys[i]
+        if query in keys:
+            match = 0
+        elif any(key.startswith(query) for key in keys):
+            match = 1
+        elif any(f" {query}" in f" {key}" for key in keys):
+            match = 2
+        else:
+            match = 3
+        return match, -share, self.names[i]
+
+    ## @brief           Finds the songs best matching a query.
+    #  @param[in] query The text entered (part of a song's name or title, possibly misspelled).
+    #  @param[in] limit The maximum number of songs to return.
+    #  @return          A list of song names, best match first (the first songs by name if the query is empty).
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = normalize(query)
+        if not query:
+            return self.sorted[:limit]
+
+        if (query, limit) not in self.results:
+            if len(self.results) > 1024:
+                self.results.clear()
+
+            # Short queries have too few trigrams to match by, so only prefixes are found
+            found = dict.fromkeys(self.prefixed(query), 1.0)
+            if len(query) >= 3:
+                grams = trigrams(query)
+                counts = Counter(i for gram in grams for i in self.grams.get(gram, ()))
+                for i, count in counts.items():
+                    if count >= MIN_OVERLAP * len(grams):
+                        found[i] = max(found.get(i, 0), count / len(grams))
+
+            ranked = sorted(self.rank(i, query, share) for i, share in found.items())
+            self.results[query, limit] = [name for _, _, name in ranked[:limit]]
+
+        return self.results[query, limit]
+
+    ## @brief           Finds the song a query names exactly, ignoring case and punctuation.
+    #  @param[in] query The text entered.
+    #  @return          The name of the song, or None if no song has that name.
+    def resolve(self, query):
+        matches = self.exact.get(normalize(query), [])
+        return matches[0] if len(matches) == 1 else None
+
+
+## @brief The search index shared by the program, and the modification time and size of each song
+#         file when it was last updated.
+searchIndex = None
+searchStamps = {}
+
+
+## @brief   Gets the shared search index, updating only the songs that were added, removed or changed.
+#  @details The song index (see Index.getSongIndex) is brought up to date first, so a song whose
+#           title was edited is found by its new title.
+#  @return  The search index.
+def getSearchIndex():
+    global searchIndex, searchStamps
+    index = getSongIndex()
+    stamps = {name: entry[0] for name, entry in index.entries.items()}
+
+    if searchIndex is None:
+        searchIndex = SearchIndex(stamps, {name: index.title(name) for name in stamps})
+    else:
+        for name in searchStamps.keys() - stamps.keys():
+            searchIndex.remove(name)
+        for name, stamp in stamps.items():
+            if searchStamps.get(name) != stamp:
+                searchIndex.add(name, index.title(name))
+
+    searchStamps = stamps
+    return searchIndex
+
+
+## @brief            Gets a message suggesting the songs closest to a song that wasn't found.
+#  @param[in] song   The name of the song that wasn't found.
+#  @param[in] search The index to search (defaults to the shared search index).
+#  @return           The message, or an empty string if no song is close.
+def suggest(song, search=None):
+    matches = (search or getSearchIndex()).search(song, 3)
+    if not matches:
+        return ""
+    return " Did you mean " + " or ".join(f"\"{m}\"" for m in matches) + "?"
+
+
+## @brief The main function that prints the songs matching a query.
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: Search.py <query>")
+        return 1
+
+    for name in getSearchIndex().search(" ".join(sys.argv[1:])):
+        print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+## @file   Songs.py
+#  @brief  Contains the song repository that parses and caches song files.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+from collections import OrderedDict
+from io import StringIO
+from locale import getpreferredencoding
+from pathlib import Path
+from threading import Lock
+
+from Compiler import compileLines
+from Stats import stats
+
+SONG_DIR = Path("src/songs")
+CACHE_SIZE = 256
+
+
+## @brief   A song file parsed into its title and lines of tokens.
+class Song:
+    __slots__ = ("name", "title", "lines", "sections", "compiled")
+
+    ## @brief           Parses the lines of a song file.
+    #  @param[in] name  The name of the song file (without ".txt").
+    #  @param[in] lines The lines of the song file.
+    def __init__(self, name, lines):
+        self.name = name
+        self.title = lines[0].strip() if lines else ""
+        # Each line after the title is stored as a tuple of its tokens
+        self.lines = tuple(tuple(line.split()) for line in lines[1:])
+        self.sections = tuple(line.split(":")[0] for line in lines[1:])
+        self.compiled = None
+
+    ## @brief  Gets the key-independent compiled lines of the song, compiling them once.
+    #  @return The compiled lines (see Compiler.compileLines).
+    #  @throw  FileError if the song has an invalid line.
+    @property
+    def ir(self):
+        if self.compiled is None:
+            self.compiled = compileLines(self.lines, self.name)
+        return self.compiled
+
+
+## @brief          Splits the contents of a song file into lines the same way as open().
+#  @param[in] data The bytes of the song file.
+#  @return         The lines of the song file.
+def readLines(data):
+    return StringIO(data.decode(getpreferredencoding(False)), newline=None).readlines()
+
+
+## @brief   A least recently used cache of parsed song files.
+#  @details A cached song is reused until its file's modification time or size changes.
+#           If index is set (see Index.py), songs are taken from it before reading files.
+class SongCache:
+    ## @brief          Creates an empty song cache.
+    #  @param[in] path The folder with the song files.
+    #  @param[in] size The maximum number of songs to keep parsed.
+    def __init__(self, path=SONG_DIR, size=CACHE_SIZE):
+        self.path = Path(path)
+        self.size = size
+        self.songs = OrderedDict()
+        self.lock = Lock()
+        self.index = None
+
+    ## @brief          Gets a parsed song, only reading the file if it changed.
+    #  @param[in] name The name of the song file (without ".txt").
+    #  @return         The parsed song.
+    def get(self, name):
+        file = self.path / f"{name}.txt"
+        stat = file.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            cached = self.songs.get(file)
+            if cached and cached[0] == stamp:
+                self.songs.move_to_end(file)
+                return cached[1]
+
+        song = self.index.lookup(name, stamp) if self.index else None
+        if song is None:
+            with stats.timer("read"):
+                data = file.read_bytes()
+            with stats.timer("parse"):
+                song = Song(name, readLines(data))
+
+        with self.lock:
+            self.songs[file] = (stamp, song)
+            self.songs.move_to_end(file)
+            while len(self.songs) > self.size:
+                self.songs.popitem(last=False)
+
+        return song
+
+    ## @brief          Removes a song from the cache (if it is cached).
+    #  @param[in] name The name of the song file (without ".txt").
+    def discard(self, name):
+        with self.lock:
+            self.songs.pop(self.path / f"{name}.txt", None)
+
+    ## @brief Removes every song from the cache.
+    def clear(self):
+        with self.lock:
+            self.songs.clear()
+
+
+## @brief The song cache shared by the program.
+songCache = SongCache()
+
+
+## @brief          Gets a parsed song from the shared song cache.
+#  @param[in] name The name of the song file (without ".txt").
+#  @return         The parsed song.
+def getSong(name):
+    return songCache.get(name)
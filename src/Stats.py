@@ -0,0 +1,188 @@
+## @file   Stats.py
+#  @brief  Contains the timers of each stage of writing charts, and the hook for profiling them.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import cProfile
+import json
+import os
+import pstats
+
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from threading import Lock, local
+from time import perf_counter
+
+## @brief The stages of writing charts, in order.
+STAGES = ("read", "parse", "transpose", "layout", "docx", "save", "pdf")
+
+## @brief The environment variables with the files to dump the stats and the profile of the GUI to.
+STATS_VARIABLE = "WORSHIPLIST_STATS"
+PROFILE_VARIABLE = "WORSHIPLIST_PROFILE"
+
+## @brief The prefix of the name of each Prometheus metric.
+METRIC_PREFIX = "worshiplist"
+
+
+## @brief   The time spent in and the number of calls of each stage, across every thread.
+#  @details Stages can be nested (eg. a song is transposed while it is written), so the time
+#           of a stage doesn't include the stages timed inside it, and the times of the
+#           stages add up to the time spent in any of them.
+class Stats:
+    ## @brief Creates empty stats.
+    def __init__(self):
+        self.lock = Lock()
+        self.seconds = {}
+        self.calls = {}
+        # Each stage being timed and the time spent in the stages nested in it, for each thread
+        self.threads = local()
+        self.profilePath = None
+        self.profiles = []
+
+    ## @brief             Adds time to a stage.
+    #  @param[in] stage   The name of the stage.
+    #  @param[in] seconds The number of seconds spent in the stage.
+    #  @param[in] calls   The number of times the stage was done.
+    def add(self, stage, seconds, calls=1):
+        with self.lock:
+            self.seconds[stage] = self.seconds.get(stage, 0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    ## @brief           Times the code in a with statement as a stage.
+    #  @details         A stage timed inside the same stage (eg. compiling the lines of a song
+    #                   while parsing it) isn't counted as another call.
+    #  @param[in] stage The name of the stage.
+    @contextmanager
+    def timer(self, stage):
+        nested = self.threads.__dict__.setdefault("nested", [])
+        calls = 0 if nested and nested[-1][0] == stage else 1
+        nested.append([stage, 0])
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            inner = nested.pop()[1]
+            if nested:
+                nested[-1][1] += elapsed
+            self.add(stage, elapsed - inner, calls)
+
+    ## @brief  Gets the stats and resets them.
+    #  @return The stats (see snapshot).
+    def take(self):
+        with self.lock:
+            seconds, calls = self.seconds, self.calls
+            self.seconds, self.calls = {}, {}
+        return ordered(seconds, calls)
+
+    ## @brief  Gets the stats.
+    #  @return A dictionary of {"seconds": seconds, "calls": calls} by stage, in the order of STAGES.
+    def snapshot(self):
+        with self.lock:
+            return ordered(self.seconds, self.calls)
+
+    ## @brief              Adds stats from somewhere else (eg. another process).
+    #  @param[in] snapshot The stats (see snapshot).
+    def merge(self, snapshot):
+        for stage, stat in snapshot.items():
+            self.add(stage, stat["seconds"], stat["calls"])
+
+    ## @brief  Formats the stats as Prometheus metrics.
+    #  @return The metrics in the Prometheus text format.
+    def prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name, kind, text in (("seconds", "seconds_total", "Seconds spent in each stage of writing charts."),
+                                 ("calls", "calls_total", "Number of times each stage of writing charts was done.")):
+            metric = f"{METRIC_PREFIX}_stage_{kind}"
+            lines += [f"# HELP {metric} {text}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{{stage=\"{stage}\"}} {stat[name]:.6g}" for stage, stat in snapshot.items()]
+        return "\n".join(lines) + "\n"
+
+    ## @brief          Saves the stats, as Prometheus metrics if the file ends with .prom and as JSON otherwise.
+    #  @param[in] path The file to save the stats to.
+    def dump(self, path):
+        path = Path(path)
+        if path.suffix == ".prom":
+            path.write_text(self.prometheus())
+        else:
+            path.write_text(json.dumps(self.snapshot(), indent=2))
+
+    ## @brief  Formats the stats as a table.
+    #  @return The table, with a line for each stage.
+    def summary(self):
+        return "\n".join(f"{stage:<10} {stat['seconds']:>9.3f} s {stat['calls']:>8} calls"
+                         for stage, stat in self.snapshot().items())
+
+    ## @brief          Turns on profiling of the code run in profiled() with cProfile.
+    #  @param[in] path The file to save the profile to (see saveProfile), or None to turn profiling off.
+    def startProfile(self, path):
+        self.profilePath = path
+        self.profiles = []
+
+    ## @brief   Profiles the code in a with statement (if profiling is on).
+    #  @details cProfile only profiles the thread it is started on, so each thread (eg. of
+    #           Worker.ChartWorker) profiles its own code, and the profiles are added together
+    #           when they are saved. Profiling can't be nested in the same thread.
+    @contextmanager
+    def profiled(self):
+        if self.profilePath is None:
+            yield
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+    ## @brief Saves the profiles of the code run in profiled() (if profiling is on), for pstats or snakeviz.
+    def saveProfile(self):
+        with self.lock:
+            if self.profilePath is not None and self.profiles:
+                pstats.Stats(*self.profiles).dump_stats(str(self.profilePath))
+
+
+## @brief             Puts stats in the order of STAGES (followed by any other stages).
+#  @param[in] seconds The number of seconds spent in each stage.
+#  @param[in] calls   The number of times each stage was done.
+#  @return            A dictionary of {"seconds": seconds, "calls": calls} by stage.
+def ordered(seconds, calls):
+    stages = [s for s in STAGES if s in calls] + sorted(calls.keys() - set(STAGES))
+    return {s: {"seconds": seconds[s], "calls": calls[s]} for s in stages}
+
+
+## @brief The stats shared by the program.
+stats = Stats()
+
+
+## @brief           Decorates a function so that each call is timed as a stage.
+#  @param[in] stage The name of the stage.
+#  @return          The decorator.
+def timed(stage):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with stats.timer(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+## @brief  Turns on profiling if the profile environment variable (see PROFILE_VARIABLE) is set.
+def profileFromEnvironment():
+    stats.startProfile(os.environ.get(PROFILE_VARIABLE) or None)
+
+
+## @brief   Saves the stats and the profile to the files in the environment variables (if set).
+#  @details The stats are also printed, so they can be read without a file.
+def dumpFromEnvironment():
+    path = os.environ.get(STATS_VARIABLE)
+    if path:
+        stats.dump(path)
+        print(stats.summary())
+    stats.saveProfile()
@@ -0,0 +1,127 @@
+## @file   Stream.py
+#  @brief  Writes .docx files one song at a time, for songbooks too large to build in memory.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import sys
+
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from Compiler import realize
+from Document import docFromTemplate, docTemplate, placeSong
+from Fragments import getFragmentCache, splitDocument, takeBody
+from Helpers import parseKey
+from Index import getSongIndex
+from Layout import pageBreak, songHeight
+from Songs import getSong
+from Stats import timed
+
+## @brief The part of a .docx file with the text of the document.
+DOCUMENT_PART = "word/document.xml"
+
+
+## @brief   A .docx file written as songs are added, instead of being saved at the end.
+#  @details Songs are written to an empty scratch document with the functions in Document.py.
+#           After each song, its paragraphs are written to the document part of the .docx file
+#           and removed from the scratch document, so memory use doesn't grow with the number
+#           of songs. Every other part of the .docx file is copied from the template.
+#           With a fragment cache, songs that don't start a new page are copied straight from
+#           their fragments to the file.
+class StreamingDocument:
+    ## @brief               Creates the .docx file and writes everything before the first song.
+    #  @param[in] path      The filename of the .docx file.
+    #  @param[in] template  The document template (from Document.docTemplate).
+    #  @param[in] fragments The cache to copy songs from (see Fragments.FragmentCache), or None to write them.
+    def __init__(self, path, template, fragments=None):
+        self.zip = ZipFile(path, "w", ZIP_DEFLATED)
+        with ZipFile(BytesIO(template)) as source:
+            for part in source.infolist():
+                if part.filename != DOCUMENT_PART:
+                    self.zip.writestr(part, source.read(part))
+            document = source.read(DOCUMENT_PART)
+
+        head, self.end, self.namespaces = splitDocument(document)
+        self.out = self.zip.open(DOCUMENT_PART, "w")
+        self.out.write(head)
+
+        self.doc = docFromTemplate(template)
+        self.fragments = fragments
+        self.pageHeight = 0
+
+    ## @brief Writes the paragraphs in the scratch document to the file and removes them.
+    def flush(self):
+        self.out.write(takeBody(self.doc, self.namespaces))
+
+    ## @brief             Writes a parsed song.
+    #  @param[in] song    The parsed song (see Songs.Song).
+    #  @param[in] key     The key of the song.
+    #  @param[in] newPage True if the song starts a new page and False otherwise.
+    #  @param[in] lines   The realized lines of the song (realized from song and key if not given).
+    @timed("docx")
+    def placeSong(self, song, key, newPage, lines=None):
+        if self.fragments is not None and not newPage:
+            self.out.write(self.fragments.get(song, key, lines))
+        else:
+            self.doc = placeSong(self.doc, song, key, newPage, lines, self.fragments)
+            self.flush()
+
+    ## @brief          Writes a parsed song, starting a new page if it won't fit (see Document.renderSong).
+    #  @param[in] song The parsed song (see Songs.Song).
+    #  @param[in] key  The key of the song.
+    def writeSong(self, song, key):
+        lines = realize(song.ir, key)
+        newPage, self.pageHeight = pageBreak(self.pageHeight, songHeight(song, key, lines))
+        self.placeSong(song, key, newPage, lines)
+
+    ## @brief Writes everything after the last song and closes the file.
+    @timed("save")
+    def close(self):
+        self.flush()
+        self.out.write(self.end)
+        self.out.close()
+        self.zip.close()
+
+    ## @brief  Uses the document in a with statement, closing it at the end.
+    #  @return The document.
+    def __enter__(self):
+        return self
+
+    ## @brief Closes the document at the end of a with statement.
+    def __exit__(self, *args):
+        self.close()
+
+
+## @brief          Writes every valid song in the song folder, in each of the given keys.
+#  @param[in] path The filename of the .docx file.
+#  @param[in] keys The keys to write each song in.
+#  @return         The number of songs written.
+def writeSongbook(path, keys):
+    index = getSongIndex()
+    count = 0
+    with StreamingDocument(path, docTemplate(), getFragmentCache()) as doc:
+        for name in index.names():
+            if index.error(name):
+                print(index.error(name))
+                continue
+            for key in keys:
+                doc.writeSong(getSong(name), key)
+                count += 1
+    return count
+
+
+## @brief The main function that writes a songbook of every song (eg. "Songbook.docx G A").
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: Stream.py <songbook.docx> <key> [<key> ...]")
+        return 1
+
+    for key in sys.argv[2:]:
+        parseKey(key)
+
+    print(f"Wrote {writeSongbook(sys.argv[1], sys.argv[2:])} songs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
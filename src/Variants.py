@@ -0,0 +1,81 @@
+## @file   Variants.py
+#  @brief  Plans a setlist in several keys at once (eg. concert key and with a capo), sharing work between them.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+from Compiler import realize
+from Helpers import capoKey, variantKey
+from Layout import layoutLine, linesHeight, paginate
+from Stats import stats
+
+
+## @brief   A setlist to be written in several variants (see Helpers.variantPattern).
+#  @details Songs are parsed once for every variant. The chords of a song only depend on the
+#           scale they are played in (see Helpers.capoKey), so songs in the same scale in more
+#           than one variant (eg. "G" and "Bb capo 3") are realized and laid out once, and
+#           variants whose songs have the same heights share one page plan.
+class SetlistVariants:
+    ## @brief             Creates the variants of a setlist.
+    #  @param[in] songs   The parsed songs (see Songs.Song).
+    #  @param[in] keys    The keys of the songs.
+    #  @param[in] reorder True if songs can be reordered to use fewer pages and False otherwise.
+    def __init__(self, songs, keys, reorder=False):
+        self.songs = songs
+        self.keys = keys
+        self.reorder = reorder
+        # The realized lines and number of laid out lines of each song in each scale
+        self.realized = {}
+        # The page plan for each list of song heights
+        self.plans = {}
+
+    ## @brief             Gets the keys of the songs in a variant.
+    #  @param[in] variant The variant.
+    #  @return            A list of keys.
+    #  @throw             ParamError if the variant isn't valid.
+    def variantKeys(self, variant):
+        return [variantKey(key, variant) for key in self.keys]
+
+    ## @brief         Gets the realized lines of a song in a key, realizing them once for each scale.
+    #  @param[in] i   The index of the song.
+    #  @param[in] key The key of the song.
+    #  @return        The realized lines and the number of lines they take up.
+    def lines(self, i, key):
+        scale = capoKey(key)
+        if (i, scale) not in self.realized:
+            lines = realize(self.songs[i].ir, scale)
+            with stats.timer("layout"):
+                self.realized[i, scale] = lines, sum(len(layoutLine(line)) for line in lines)
+        return self.realized[i, scale]
+
+    ## @brief         Measures the height of a song, like Layout.songHeight.
+    #  @param[in] i   The index of the song.
+    #  @param[in] key The key of the song.
+    #  @return        The height of the song in points, including the space after it.
+    def height(self, i, key):
+        return linesHeight(self.songs[i].title, key, self.lines(i, key)[1])
+
+    ## @brief             Plans the order of songs and where pages break in a variant (see Layout.paginate).
+    #  @param[in] variant The variant.
+    #  @return            A list of (index of song, True if it starts a new page) in the order to write them.
+    def plan(self, variant):
+        keys = self.variantKeys(variant)
+        heights = tuple(self.height(i, key) for i, key in enumerate(keys))
+        if heights not in self.plans:
+            pages = paginate(heights, self.reorder)
+            self.plans[heights] = [(i, p > 0 and j == 0) for p, page in enumerate(pages) for j, i in enumerate(page)]
+        return self.plans[heights]
+
+    ## @brief             Gets everything needed to write each song of a variant, in order.
+    #  @param[in] variant The variant.
+    #  @return            A list of (song, key, True if it starts a new page, realized lines).
+    def items(self, variant):
+        keys = self.variantKeys(variant)
+        return [(self.songs[i], keys[i], newPage, self.lines(i, keys[i])[0]) for i, newPage in self.plan(variant)]
+
+
+## @brief              Gets the name of the file of a variant of a chart.
+#  @param[in] filename The name of the chart.
+#  @param[in] variant  The variant.
+#  @return             The name of the chart for the variant (eg. "Sunday (capo 2)").
+def variantName(filename, variant):
+    return f"{filename} ({variant})" if variant else filename
@@ -0,0 +1,190 @@
+## @file   Word.py
+#  @brief  Contains a converter that keeps one Word instance open to convert many .docx files to .pdf.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+import atexit
+
+from concurrent.futures import Future
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Thread
+
+from Stats import timed
+
+## @brief The file format code of a .pdf file in Word.
+PDF_FORMAT = 17
+
+## @brief The default number of conversions that can wait for Word.
+QUEUE_SIZE = 16
+
+## @brief The default number of seconds Word can be idle before it is closed.
+IDLE_TIMEOUT = 60
+
+
+## @brief  Starts Word with COM.
+#  @return The Word application.
+def dispatchWord():
+    # Word is only available on Windows
+    import pythoncom
+    import win32com.client
+
+    pythoncom.CoInitialize()
+    return win32com.client.DispatchEx("Word.Application")
+
+
+## @brief   A converter that keeps one instance of Word open across many conversions.
+#  @details Conversions are queued (blocking when the queue is full) and run in order on
+#           one thread, which owns the Word instance. If a call to Word fails, Word is
+#           restarted and the conversion is tried once more. Word is closed after being
+#           idle for idleTimeout seconds, and started again when needed.
+class WordConverter:
+    ## @brief                 Starts the conversion thread (but not Word).
+    #  @param[in] dispatch    A function that starts Word (eg. dispatchWord or FakeWord).
+    #  @param[in] queueSize   The number of conversions that can wait for Word.
+    #  @param[in] idleTimeout The number of seconds Word can be idle before it is closed.
+    def __init__(self, dispatch=dispatchWord, queueSize=QUEUE_SIZE, idleTimeout=IDLE_TIMEOUT):
+        self.dispatch = dispatch
+        self.idleTimeout = idleTimeout
+        self.jobs = Queue(queueSize)
+        self.word = None
+        self.starts = 0
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    ## @brief          Queues a conversion.
+    #  @param[in] docx The filename of the .docx file.
+    #  @param[in] pdf  The filename of the .pdf file.
+    #  @return         A future with True if the conversion was successful and False otherwise.
+    def submit(self, docx, pdf):
+        future = Future()
+        self.jobs.put((future, Path(docx).resolve(), Path(pdf).resolve()))
+        return future
+
+    ## @brief          Converts a file, waiting for the conversions queued before it.
+    #  @param[in] docx The filename of the .docx file.
+    #  @param[in] pdf  The filename of the .pdf file.
+    #  @return         True if the conversion was successful and False otherwise.
+    def convert(self, docx, pdf):
+        return self.submit(docx, pdf).result()
+
+    ## @brief Finishes the queued conversions, then closes Word and stops the thread.
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+    ## @brief  Uses the converter in a with statement, closing it at the end.
+    #  @return The converter.
+    def __enter__(self):
+        return self
+
+    ## @brief Closes the converter at the end of a with statement.
+    def __exit__(self, *args):
+        self.close()
+
+    ## @brief Runs queued conversions until the converter is closed.
+    def run(self):
+        while True:
+            try:
+                job = self.jobs.get(timeout=self.idleTimeout if self.word else None)
+            except Empty:
+                self.quit()
+                continue
+
+            if job is None:
+                self.quit()
+                return
+
+            future, docx, pdf = job
+            if future.set_running_or_notify_cancel():
+                future.set_result(self.convertNow(docx, pdf))
+
+    ## @brief          Converts a file with Word, restarting Word and retrying once if it fails.
+    #  @param[in] docx The filename of the .docx file.
+    #  @param[in] pdf  The filename of the .pdf file.
+    #  @return         True if the conversion was successful and False otherwise.
+    @timed("pdf")
+    def convertNow(self, docx, pdf):
+        for _ in range(2):
+            try:
+                if self.word is None:
+                    self.word = self.dispatch()
+                    self.starts += 1
+                doc = self.word.Documents.Open(str(docx))
+                doc.SaveAs(str(pdf), FileFormat=PDF_FORMAT)
+                doc.Close()
+                return True
+            except Exception:
+                # Word may have crashed, so it is started again
+                self.quit()
+        return False
+
+    ## @brief Closes Word (if it is open).
+    def quit(self):
+        if self.word is not None:
+            try:
+                self.word.Quit()
+            except Exception:
+                pass
+            self.word = None
+
+
+## @brief The converter shared by the program (started by getConverter).
+converter = None
+
+
+## @brief  Gets the shared converter, starting it if needed.
+#  @details The converter is closed (closing Word) when the program exits.
+#  @return The converter.
+def getConverter():
+    global converter
+    if converter is None:
+        converter = WordConverter()
+        atexit.register(converter.close)
+    return converter
+
+
+## @brief   A stand-in for Word's COM interface, for using WordConverter without Word.
+#  @details "Converting" a file writes a .pdf with a line of text naming the .docx file.
+#           Opening a file whose name contains "crash" raises an error, like a COM call to a
+#           crashed instance of Word.
+class FakeWord:
+    ## @brief Creates a stand-in for a Word application.
+    def __init__(self):
+        self.Documents = self
+        self.open = True
+
+    ## @brief          Opens a document.
+    #  @param[in] path The filename of the document.
+    #  @return         The document.
+    def Open(self, path):
+        if not self.open or "crash" in Path(path).name:
+            raise OSError("The remote procedure call failed.")
+        return FakeWordDocument(path)
+
+    ## @brief Closes the application.
+    def Quit(self):
+        self.open = False
+
+
+## @brief   A stand-in for a document opened in Word (see FakeWord).
+class FakeWordDocument:
+    ## @brief          Opens a document.
+    #  @param[in] path The filename of the document.
+    def __init__(self, path):
+        self.path = path
+
+    ## @brief                Saves the document as a .pdf with a line of text.
+    #  @param[in] path       The filename of the .pdf file.
+    #  @param[in] FileFormat The file format code (only PDF_FORMAT is supported).
+    def SaveAs(self, path, FileFormat):
+        # Imported here so Word.py doesn't depend on Pdf.py
+        from Pdf import PdfDocument
+
+        pdf = PdfDocument()
+        pdf.text(72, 72, Path(self.path).name, 12)
+        pdf.save(path)
+
+    ## @brief Closes the document.
+    def Close(self):
+        pass
@@ -0,0 +1,213 @@
+## @file   Worker.py
+#  @brief  Writes charts on a background thread so the GUI stays responsive.
+#  @author Samuel Crawford
+#  @date   10/18/2026
+
+from collections import namedtuple
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+
+from Document import docSetup, placeSong
+from Fragments import getFragmentCache
+from Helpers import getOutputDir
+from Pdf import pdfSave
+from Pipeline import readSongs
+from Stats import stats
+from Variants import SetlistVariants, variantName
+from Word import getConverter
+
+## @brief A chart to write: its songs, their keys, its file name and its variants (see Helpers.variantPattern).
+Job = namedtuple("Job", ["songs", "keys", "filename", "variants"])
+
+
+## @brief  Exception for a chart that was cancelled while it was being written.
+class Cancelled(Exception):
+    pass
+
+
+## @brief   A thread that writes charts in the order they are submitted.
+#  @details Each chart is written and saved as a .docx, then converted to .pdf by Word (see
+#           Word.WordConverter) while the next chart is written. The progress of each chart
+#           is reported as events, which the GUI reads with poll():
+#           ("progress", filename, (steps done, total steps, message)),
+#           ("saved", filename, message), ("cancelled", filename, None) and ("failed", filename, error).
+class ChartWorker:
+    ## @brief Starts the thread.
+    def __init__(self):
+        self.jobs = Queue()
+        self.events = Queue()
+        self.cancelled = Event()
+        self.lock = Lock()
+        self.pending = 0
+        self.running = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    ## @brief         Queues a chart to be written.
+    #  @param[in] job The chart (see Job).
+    def submit(self, job):
+        with self.lock:
+            self.pending += 1
+        self.jobs.put(job)
+
+    ## @brief  Gets the number of charts that are queued or being written or converted.
+    #  @return The number of charts.
+    def busy(self):
+        return self.pending
+
+    ## @brief Cancels every chart that is queued or being written.
+    def cancel(self):
+        self.cancelled.set()
+        # Cancelling is done once the thread reaches the marker
+        self.jobs.put(False)
+
+    ## @brief  Gets the events reported since the last call.
+    #  @return A list of (kind, filename, value) events.
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except Empty:
+                return events
+
+    ## @brief            Stops the thread once the charts it is writing are done.
+    #  @param[in] cancel True to cancel every chart that is queued or being written, and False to
+    #                    write them first.
+    def stop(self, cancel=True):
+        if cancel:
+            self.cancel()
+        self.jobs.put(None)
+        self.thread.join()
+
+    ## @brief          Runs a function on the worker's thread after the charts queued before it.
+    #  @details        Once the worker has stopped, the function is run right away instead.
+    #  @param[in] task The function, which takes no arguments.
+    def runLater(self, task):
+        with self.lock:
+            if self.running:
+                self.jobs.put(task)
+                return
+        task()
+
+    ## @brief Writes queued charts until the worker is stopped.
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if callable(job):
+                job()
+                continue
+            elif job is None:
+                with self.lock:
+                    self.running = False
+                # Runs the functions queued before the worker stopped
+                while True:
+                    try:
+                        job = self.jobs.get_nowait()
+                    except Empty:
+                        return
+                    if callable(job):
+                        job()
+            elif job is False:
+                self.cancelled.clear()
+                continue
+            elif self.cancelled.is_set():
+                self.finished(("cancelled", job.filename, None))
+                continue
+
+            try:
+                with stats.profiled():
+                    self.write(job)
+            except Cancelled:
+                self.finished(("cancelled", job.filename, None))
+            except Exception as e:
+                self.finished(("failed", job.filename, str(e)))
+
+    ## @brief           Reports the last event of a chart.
+    #  @param[in] event The event.
+    def finished(self, event):
+        with self.lock:
+            self.pending -= 1
+        self.events.put(event)
+
+    ## @brief         Writes a chart in every variant, then converts them to .pdf in the background.
+    #  @param[in] job The chart (see Job).
+    #  @throw         Cancelled if the chart was cancelled.
+    def write(self, job):
+        variants = [""] + job.variants
+        total = len(variants) * (len(job.songs) + 1)
+        done = 0
+
+        def progress(message):
+            nonlocal done
+            done += 1
+            print(message)
+            self.events.put(("progress", job.filename, (done, total, message)))
+
+        # Reads the songs at the same time, and parses each song once for every variant
+        songs = readSongs(job.songs)
+        setlist = SetlistVariants([songs[song] for song in job.songs], job.keys)
+
+        filepath = getOutputDir()
+        if not filepath.is_dir():
+            raise OSError(f"Can't find file path {filepath}. Make sure your file path is correct in Settings.txt.")
+
+        saved = []
+        for variant in variants:
+            doc = docSetup()
+            name = variantName(job.filename, variant)
+
+            # Writes each song
+            for song, key, newPage, lines in setlist.items(variant):
+                if self.cancelled.is_set():
+                    raise Cancelled()
+                doc = placeSong(doc, song, key, newPage, lines, getFragmentCache())
+                progress(f"Wrote {song.name} ({key}).")
+
+            filepathDOCX = filepath / f"{name}.docx"
+            with stats.timer("save"):
+                doc.save(str(filepathDOCX))
+            progress(f"Saved {name}.docx.")
+            saved.append((filepathDOCX, filepath / f"{name}.pdf", setlist.variantKeys(variant)))
+
+        self.convert(job, saved)
+
+    ## @brief           Converts the .docx files of a chart to .pdf with Word without waiting for Word.
+    #  @details         Files Word can't convert are written directly (see Pdf.pdfSave) on the worker's
+    #                   thread, so Word's thread can go on to the next conversion.
+    #  @param[in] job   The chart (see Job).
+    #  @param[in] saved A list of the .docx file, .pdf file and keys of each variant.
+    def convert(self, job, saved):
+        futures = [getConverter().submit(docx, pdf) for docx, pdf, _ in saved]
+        results = []
+
+        def converted(future, pdf, keys):
+            try:
+                result = future.result()
+            except Exception:
+                result = False
+
+            if result:
+                report(result)
+            else:
+                self.runLater(lambda: report(fallback(pdf, keys)))
+
+        def fallback(pdf, keys):
+            try:
+                return pdfSave(job.songs, keys, pdf)
+            except Exception:
+                return False
+
+        def report(result):
+            # Conversions finish on different threads, so the last one reports the chart
+            with self.lock:
+                results.append(result)
+                if len(results) != len(saved):
+                    return
+            if all(results):
+                self.finished(("saved", job.filename, "Chord sheet converted to PDF."))
+            else:
+                self.finished(("failed", job.filename, "Error saving chord sheet as PDF."))
+
+        for future, (_, pdf, keys) in zip(futures, saved):
+            future.add_done_callback(lambda future, pdf=pdf, keys=keys: converted(future, pdf, keys))